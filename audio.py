@@ -0,0 +1,142 @@
+# Sound effects and music for Tetron. Sound effects are loaded when first played, or on a background thread after the window opens, and music is read into memory before it is needed, so that loading audio does not delay startup or gameplay.
+
+
+import io
+import os
+import threading
+import time
+
+import pygame
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that loads sound effects from a folder when they are first used or on a background thread.
+class SoundRegistry:
+    # Initialize the attributes of the instance of this class by inputting the folder containing the .wav files and a list of tuples (name, volume) in the order they should be loaded.
+    def __init__(self, folder, volumes):
+        self.folder = folder
+        self.volumes = dict(volumes)
+        self.names = [name for name, _ in volumes]
+        # Initialize the dictionary of loaded sounds and the time (ms) taken to load each sound.
+        self.sounds = {}
+        self.durations = {}
+        # Create the lock that prevents a sound from being loaded by two threads at once.
+        self.lock = threading.Lock()
+        self.thread = None
+
+    # Return the sound with the given name, loading it first if it is not already loaded.
+    def __getitem__(self, name):
+        sound = self.sounds.get(name)
+        if sound is None:
+            sound = self.load_sound(name)
+        return sound
+
+    # Play the sound with the given name.
+    def play(self, name):
+        self[name].play()
+
+    # Load and return the sound with the given name unless it was already loaded by another thread.
+    def load_sound(self, name):
+        with self.lock:
+            if name not in self.sounds:
+                time_start = time.perf_counter()
+                sound = pygame.mixer.Sound(os.path.join(self.folder, '{}.wav'.format(name)))
+                sound.set_volume(self.volumes[name])
+                self.durations[name] = (time.perf_counter() - time_start) * 1000
+                self.sounds[name] = sound
+            return self.sounds[name]
+
+    # Load sounds in order until the given duration (ms) has elapsed, then load the remaining sounds on a background thread.
+    def load(self, budget=0):
+        time_start = time.perf_counter()
+        for index, name in enumerate(self.names):
+            if (time.perf_counter() - time_start) * 1000 >= budget:
+                self.thread = threading.Thread(target=self.load_all, args=(self.names[index:],), daemon=True)
+                self.thread.start()
+                break
+            self.load_sound(name)
+
+    # Load each of the given sounds that is not already loaded.
+    def load_all(self, names):
+        for name in names:
+            if name not in self.sounds:
+                self.load_sound(name)
+
+    # Return True if every sound is loaded.
+    def is_loaded(self):
+        return len(self.sounds) == len(self.names)
+
+
+# A class that plays music, reading the tracks that may be played next into memory on a background thread so that switching tracks does not wait for files to be read.
+class MusicManager:
+    # Initialize the attributes of the instance of this class by inputting the folder containing the .ogg files and the number of stages in a game.
+    def __init__(self, folder, stage_count):
+        self.folder = folder
+        self.stage_count = stage_count
+        # Initialize the dictionary containing the contents of files read into memory.
+        self.files = {}
+        # Initialize the files used by the current and queued tracks, which must be kept while playing.
+        self.file_current = None
+        self.file_next = None
+
+    # Read the tracks with the given names into memory on a background thread, and discard other tracks previously read.
+    def prefetch(self, names):
+        for name in list(self.files):
+            if name not in names:
+                del self.files[name]
+        names = [name for name in names if name not in self.files]
+        if len(names) > 0:
+            threading.Thread(target=self.read_all, args=(names,), daemon=True).start()
+
+    # Read the tracks that may be played during or after the given stage: the music for the stage, the transition to and music for the next stage, and the win and lose music.
+    def prefetch_stage(self, stage):
+        names = ['tetron_{}'.format(stage+1), 'tetron_win', 'tetron_lose']
+        if stage + 1 < self.stage_count:
+            names += ['tetron_transition_{}'.format(stage+1), 'tetron_{}'.format(stage+2)]
+        self.prefetch(names)
+
+    # Read each of the given tracks into memory.
+    def read_all(self, names):
+        for name in names:
+            with open(self.get_path(name), 'rb') as file:
+                self.files[name] = file.read()
+
+    # Return the path to the track with the given name.
+    def get_path(self, name):
+        return os.path.join(self.folder, '{}.ogg'.format(name))
+
+    # Return a file object for the track with the given name, read from memory if it was prefetched or from the folder otherwise.
+    def get_file(self, name):
+        contents = self.files.get(name)
+        if contents is None:
+            return open(self.get_path(name), 'rb')
+        return io.BytesIO(contents)
+
+    # Play the track with the given name the given number of additional times, or indefinitely for -1. Input the name of another track to play it indefinitely after the first track ends.
+    def play(self, name, loops=0, name_next=None):
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+        self.file_current = self.get_file(name)
+        pygame.mixer.music.load(self.file_current, 'ogg')
+        pygame.mixer.music.play(loops=loops)
+        self.file_next = None
+        if name_next is not None:
+            self.file_next = self.get_file(name_next)
+            pygame.mixer.music.queue(self.file_next, 'ogg', loops=-1)
+
+    # Pause the current track.
+    def pause(self):
+        pygame.mixer.music.pause()
+
+    # Resume the current track.
+    def unpause(self):
+        pygame.mixer.music.unpause()
+
+    # Stop and unload the current track.
+    def stop(self):
+        pygame.mixer.music.stop()
+        pygame.mixer.music.unload()
+        self.file_current = None
+        self.file_next = None
@@ -0,0 +1,171 @@
+#!/usr/bin/python
+
+# Benchmark for Tetron. Runs scripted scenarios covering each game mode for a fixed number of simulated seconds, with player games controlled by the AI, and writes the number of ticks and tetriminos per second and the time spent in some methods as JSON.
+
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+import engine
+
+
+# =============================================================================
+# Benchmark Settings.
+# =============================================================================
+# Define the names of the scenarios to run.
+names_scenario = ['classic', 'special', 'twin', '1v1', 'many', '99']
+# Define the names of the methods to time.
+names_method = ['rotate', 'lock', 'update', 'draw_matrix', 'ai_evaluate']
+# Define the number of AI games in the many-AI scenario.
+count_many = 16
+
+
+# =============================================================================
+# Functions.
+# =============================================================================
+# Return a subclass of the given game class that adds the number of calls and the duration (ms) of each of the given methods to the given dictionary. Durations include the time spent in other timed methods called by the method.
+def create_timed_class(game_class, names, timings):
+    def time_method(name):
+        method = getattr(game_class, name)
+        def timed(self, *args, **kwargs):
+            time_start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                timings[name][0] += 1
+                timings[name][1] += (time.perf_counter() - time_start) * 1000
+        return timed
+    return type('Timed' + game_class.__name__, (game_class,), {name: time_method(name) for name in names})
+
+# Create the games for a scenario with the given name, using the given classes.
+def create_games(name, games_class, game_class, seed):
+    games = games_class()
+    games.seed = seed
+    games.game_class = game_class
+    games.add_game(game_class(True, 0, games))
+    if name == 'classic':
+        games.flag_classic = True
+    elif name == 'twin':
+        games.set_mode(2)
+    elif name == '1v1':
+        games.set_mode(3)
+    elif name == 'many':
+        games.game_mode = 3
+        for _ in range(count_many):
+            games.add_game(game_class(False, len(games.all), games))
+    elif name == '99':
+        games.set_mode(4)
+    if hasattr(games, 'reposition_games'):
+        games.reposition_games()
+    return games
+
+# Run the scenario with the given name for the given number of simulated seconds and return a dictionary of results. Games are restarted when the player wins or loses. Input True for 'display' to use the classes that draw the games.
+def run_scenario(name, seconds, seed, display=False):
+    if display:
+        import tetron
+        games_class, game_class = tetron.GamesDisplay, tetron.TetronDisplay
+    else:
+        games_class, game_class = engine.Games, engine.Tetron
+    timings = {method: [0, 0] for method in names_method}
+    game_class = create_timed_class(game_class, names_method, timings)
+
+    # Force special effects on every tetrimino, restoring the settings afterwards.
+    settings = (engine.weights_special, engine.score_update_chance_special)
+    if name == 'special':
+        engine.weights_special = [1, 1]
+        engine.score_update_chance_special = 0
+    try:
+        games = create_games(name, games_class, game_class, seed)
+        games.start_games()
+        count_tick = 0
+        count_piece = 0
+        count_restart = 0
+        time_start = time.perf_counter()
+        while games.time_current < seconds * 1000:
+            games.set_time(games.time_current + engine.duration_tick)
+            # Control player games with the AI.
+            for game in games.player:
+                if game.flag_playing:
+                    game.ai_evaluate()
+            games.update_score()
+            if games.update_progress() in ['win', 'lose']:
+                count_piece += sum([game.count for game in games.all])
+                if games.batch is not None:
+                    count_piece += int(np.sum(games.batch.counts))
+                count_restart += 1
+                games.start_games()
+            games.step()
+            if hasattr(games, 'draw_matrices'):
+                games.draw_matrices()
+            count_tick += 1
+        duration = time.perf_counter() - time_start
+        count_piece += sum([game.count for game in games.all])
+        if games.batch is not None:
+            count_piece += int(np.sum(games.batch.counts))
+        games.close()
+    finally:
+        engine.weights_special, engine.score_update_chance_special = settings
+
+    return {
+        'ticks': count_tick,
+        'pieces': count_piece,
+        'restarts': count_restart,
+        'duration': duration,
+        'ticks_per_second': count_tick / duration,
+        'pieces_per_second': count_piece / duration,
+        'methods': {
+            method: {'calls': calls, 'total_ms': total, 'mean_us': 1000 * total / calls if calls else 0}
+            for method, (calls, total) in timings.items()
+            },
+        }
+
+# Return the parsed command-line arguments, using the arguments given to the program if none are given.
+def parse_arguments(args=None):
+    parser = argparse.ArgumentParser(description='Run scripted Tetron scenarios and write the results as JSON.')
+    parser.add_argument('--scenarios', nargs='+', choices=names_scenario, default=names_scenario, help='scenarios to run')
+    parser.add_argument('--seconds', type=float, default=60, help='simulated seconds to run each scenario')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the random number generators of each game')
+    parser.add_argument('--display', action='store_true', help='draw the games on a hidden window to include drawing in the timings')
+    parser.add_argument('--output', metavar='PATH', help='write results to a file instead of printing them')
+    return parser.parse_args(args)
+
+
+# =============================================================================
+# Main Program.
+# =============================================================================
+def main(args=None):
+    arguments = parse_arguments(args)
+    # Use drivers that do not need a screen or an audio device.
+    if arguments.display:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    results = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'seconds': arguments.seconds,
+        'seed': arguments.seed,
+        'display': arguments.display,
+        'scenarios': {},
+        }
+    for name in arguments.scenarios:
+        results['scenarios'][name] = run_scenario(name, arguments.seconds, arguments.seed, arguments.display)
+        print('{:<8} {:>10.0f} ticks/s {:>8.1f} pieces/s'.format(name, results['scenarios'][name]['ticks_per_second'], results['scenarios'][name]['pieces_per_second']), file=sys.stderr)
+
+    text = json.dumps(results, indent=4)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
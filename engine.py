@@ -0,0 +1,2338 @@
+# Display-free game rules for Tetron. Importing this module does not initialize pygame, so games can be simulated without a window or an audio device.
+
+
+import concurrent.futures
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from features import BoardFeatures, calculate_tops
+from randomizers import PoolRandomizer, strategies
+
+
+# =============================================================================
+# Game Settings.
+# =============================================================================
+# Define the scores needed to move to the next stage. The last value is the score needed to win the game.
+score_thresholds = [400, 800, 1000]
+# Define the numbers of remaining players needed to move to the next stage. The last value is the number needed to win the game.
+remaining_thresholds = [50, 10, 1]
+# Define the range of block fall speeds (ms) from the start to end of the game.
+speeds_fall = [1000, 1000/6]
+speeds_fall_classic = [1000, 1000/60]
+# Define the block fall speed multiplier for some special effects (values below 1 result in faster speeds).
+speed_fall_multiplier = 1/2
+# Define the block move speed (ms) and initial delay for key repeats (ms).
+speed_move = 25
+delay_move = 150
+# Define the soft drop speed (ms) and initial delay for key repeats (ms).
+speed_softdrop = 50
+delay_softdrop = 50
+# Define the maximum duration (ms) for a tetrimino to remain landed before locking.
+duration_max_landed = 500
+# Define the time (ms) between receiving garbage and putting garbage in the matrix on the next hard drop.
+time_garbage_warning = 8000
+# Define the duration (ms) of one simulation tick. Games advance by whole ticks, several per frame if needed, so that play does not depend on the frame rate.
+duration_tick = 5
+# Define the maximum number of ticks simulated in one step, after which the games skip ahead to the current time instead of catching up.
+tick_count_max = 50
+
+# Define the parameters of a normal distribution for the delay (ms) between deciding and performing a move for AI.
+ai_delay_mean = 1500
+ai_delay_std = 100
+# Define the number of worker processes used to decide AI moves, or 0 to decide AI moves in the main loop.
+ai_processes = 0
+# Define the weights used to score placements when not searching ahead: for cleared lines, the heights of the top and bottom blocks of the placed tetrimino, occupying the top row, and each new hole.
+ai_weights_greedy = {'lines': 1, 'top': -1, 'bottom': -1, 'top_row': -100, 'holes': -5}
+# Define whether AI games decide moves on a background thread, which searches further ahead until the move is performed. Not used when the games have a seed, so that seeded games are the same on every computer, or when AI moves are decided in worker processes.
+ai_thread = True
+# Define the number of tetriminos in the next queue that AI games search ahead, or 0 to only evaluate the current tetrimino and the tetrimino in the hold queue.
+ai_lookahead = 2
+# Define the number of best placements kept at each tetrimino when searching ahead.
+ai_beam_width = 6
+# Define the time (ms) that AI games can spend searching ahead for each decision when not searching on a background thread. The search stops at the last tetrimino it finished within this time. Not used when the games have a seed, so that seeded games are the same on every computer.
+ai_budget = 5
+# Define the weights of the board features used to score placements when searching ahead.
+ai_weights = {'lines': 3.4, 'holes': -7.9, 'transitions': -3.2, 'wells': -3.4, 'bumpiness': -1.0, 'height': -1.5}
+# Define the number of AI games simulated together in the 99-player mode.
+batch_count = 98
+# Define the actions applied by players and by AI games, in the order of the codes used to record them.
+actions_player = ['move_left', 'move_right', 'rotate_clockwise', 'rotate_counterclockwise', 'harddrop', 'softdrop', 'softdrop_stop', 'hold']
+actions_ai = ['hold', 'rotate', 'move_left', 'move_right', 'harddrop']
+
+# Define how many blocks to show in the next queue.
+next_count = 5
+# Define the strategy used to select tetriminos, one of the strategies in the randomizers module: 'pools' to select the category of each tetrimino independently and avoid repeating tetriminos in each category, 'bag' to select classic tetriminos in bags of 7, or 'history' to avoid the most recent tetriminos.
+randomizer = 'pools'
+# Define the IDs for classic tetriminos, advanced tetriminos, special effects.
+id_classic = [100, 200, 300, 400, 500, 600, 700]
+id_advanced = [101, 102, 201, 202, 203, 301, 302, 303, 401, 402, 403, 501, 601, 602, 701, 801, 811, 812, 813, 814, 899]
+id_special = ['ghost', 'heavy', 'disoriented', 'blind', 'wind', 'zombie', 'fake']
+
+# Define the range of probabilities (between 0 and 1) of getting an advanced tetrimino.
+weights_advanced = [0, 1/3]
+# Define the score needed to begin increasing the probability of getting an advanced tetrimino.
+score_update_chance_advanced = 100
+# Define the range of probabilities (between 0 and 1) of getting a special effect.
+weights_special = [0, 1/20]
+# Define the score needed to begin increasing the probability of getting a special effect.
+score_update_chance_special = score_thresholds[0]
+# Define settings for special effects (ms).
+duration_disoriented = 10000
+duration_blind = 10000
+speed_wind = 500
+
+
+# =============================================================================
+# Random Numbers.
+# =============================================================================
+# Return a random number generator for the given purpose of the game with the given name. Generators are seeded from the seed of the games and the number of times the games were started, so that runs with the same seed are identical, or seeded randomly if the games have no seed.
+def create_random(games, name, purpose):
+    if games.seed is None:
+        return random.Random()
+    return random.Random('{}-{}-{}-{}'.format(games.seed, games.count_start, name, purpose))
+
+
+# =============================================================================
+# Saved States.
+# =============================================================================
+# Return a dictionary of the attributes of the given object that can be saved and restored, excluding attributes with the given names. Attributes referencing other objects, such as those used for display, are excluded. The values are not copied.
+def get_attributes(instance, names_excluded):
+    types = (bool, int, float, str, type(None), list, tuple, dict, np.ndarray, np.generic, random.Random, RowBuffer, PoolRandomizer)
+    return {name: value for name, value in vars(instance).items() if name not in names_excluded and isinstance(value, types)}
+
+# Restore the attributes of the given object from a dictionary created by get_attributes with the same names excluded. Attributes that would have been saved but are not in the dictionary, such as those first set after the dictionary was created, are deleted.
+def set_attributes(instance, state, names_excluded):
+    for name in get_attributes(instance, names_excluded):
+        if name not in state:
+            delattr(instance, name)
+    vars(instance).update(state)
+
+
+# =============================================================================
+# Bitboards.
+# =============================================================================
+# Return the row masks of a tetrimino array as a list of (row, mask) tuples, in which bit j of each mask is set if column j of the row contains a block. Also return the (top, bottom, left, right) indices of the blocks and a list of (column, row) tuples for the bottommost block in each column.
+def create_masks(tetrimino):
+    filled = tetrimino > 0
+    bits = 1 << np.arange(filled.shape[1])
+    rows = np.flatnonzero(np.any(filled, axis=1))
+    columns = np.flatnonzero(np.any(filled, axis=0))
+    masks = [(int(row), int(filled[row].dot(bits))) for row in rows]
+    bounds = (int(rows[0]), int(rows[-1]), int(columns[0]), int(columns[-1]))
+    bottoms = [(int(column), int(filled.shape[0]-1 - np.argmax(filled[::-1, column]))) for column in columns]
+    return masks, bounds, bottoms
+
+# Return a Boolean indicating whether a tetrimino with the given masks is outside the matrix or intersects placed blocks in the given bitboard if its top left corner is at the given row and column.
+def check_collision(rows_stack, column_count, masks, row, column):
+    masks, (top, bottom, left, right), _ = masks
+    if row + top < 0 or row + bottom >= len(rows_stack) or column + left < 0 or column + right >= column_count:
+        return True
+    if column >= 0:
+        for index, mask in masks:
+            if rows_stack[row+index] & (mask << column):
+                return True
+    else:
+        for index, mask in masks:
+            if rows_stack[row+index] & (mask >> -column):
+                return True
+    return False
+
+
+
+# =============================================================================
+# Rotations.
+# =============================================================================
+# Return the array for a tetrimino that always has the same shape, in its initial rotation.
+def create_template(number):
+    # Classic tetriminos.
+    if number == id_classic[0]:  # I
+        tetrimino = number * np.ones([4, 4])
+        tetrimino[[0,2,3], :] = -1
+    elif number == id_classic[1]:  # J
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0, 1:] = -1
+        tetrimino[2, :] = -1
+    elif number == id_classic[2]:  # L
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0, 0:2] = -1
+        tetrimino[2, :] = -1
+    elif number == id_classic[3]:  # O
+        tetrimino = number * np.ones([2, 2])
+    elif number == id_classic[4]:  # S
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0, 0] = -1
+        tetrimino[1, 2] = -1
+        tetrimino[2, :] = -1
+    elif number == id_classic[5]:  # T
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0, [0,2]] = -2
+        tetrimino[2, [0,2]] = -3
+        tetrimino[2, 1] = -1
+    elif number == id_classic[6]:  # Z
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0, 2] = -1
+        tetrimino[1, 0] = -1
+        tetrimino[2, :] = -1
+    # Advanced tetriminos.
+    elif number == 101:  # I+ (1x5)
+        tetrimino = number * np.ones([5, 5])
+        tetrimino[[0,2,3,4], :] = -1
+    elif number == 102:  # I- (1x3)
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[[0,2], :] = -1
+    elif number == 201:  # J+ (3x3)
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0:2, 1:3] = -1
+    elif number == 202:  # J- (2x2)
+        tetrimino = number * np.ones([2, 2])
+        tetrimino[0, 1] = -1
+    elif number == 203:  # J+ (2x4)
+        tetrimino = number * np.ones([4, 4])
+        tetrimino[[0,3], :] = -1
+        tetrimino[1, 1:4] = -1
+    elif number == 301:  # L+ (3x3)
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0:2, 0:2] = -1
+    elif number == 302:  # L- (2x2)
+        tetrimino = number * np.ones([2, 2])
+        tetrimino[0, 0] = -1
+    elif number == 303:  # L+ (2x4)
+        tetrimino = number * np.ones([4, 4])
+        tetrimino[[0,3], :] = -1
+        tetrimino[1, 0:3] = -1
+    elif number == 401:  # O+ (2x3)
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[2, :] = -1
+    elif number == 402:  # O+ (2x4)
+        tetrimino = number * np.ones([4, 4])
+        tetrimino[[0,3], :] = -1
+    elif number == 403:  # O+ (Ring)
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[1, 1] = -1
+    elif number == 501:  # S+
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0:2, 0] = -1
+        tetrimino[1:3, 2] = -1
+    elif number == 601:  # T+ (Plus)
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[0, 0] = -1
+        tetrimino[0, 2] = -1
+        tetrimino[2, 0] = -1
+        tetrimino[2, 2] = -1
+    elif number == 602:  # T+ (Capital)
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[1:3, [0,2]] = -1
+    elif number == 701:  # Z+
+        tetrimino = number * np.ones([3, 3])
+        tetrimino[1:3, 0] = -1
+        tetrimino[0:2, 2] = -1
+    elif number == 811:  # Period (.)
+        tetrimino = number * np.ones([1, 1])
+    elif number == 812:  # Comma (,)
+        tetrimino = number * np.ones([2, 2])
+        tetrimino[[0,1],[0,1]] = -1
+    elif number == 813:  # Colon (:)
+        tetrimino = -1 * np.ones([3, 3])
+        tetrimino[1, [0,2]] = number
+    elif number == 814:  # Quotation (")
+        tetrimino = -1 * np.ones([3, 3])
+        tetrimino[0:2, [0,2]] = number
+    return tetrimino
+
+# List of lists of tuples for all translation values (right, down) for each rotation, defined in the order they should be checked.
+translations_all = [
+    # J, L, S, T, Z and their variants
+    [( 0, 0),	(-1, 0),	(-1,-1),	( 0,+2),	(-1,+2),],  # 0->R
+    [( 0, 0),	(+1, 0),	(+1,+1),	( 0,-2),	(+1,-2),],  # R->0
+    [( 0, 0),	(+1, 0),	(+1,+1),	( 0,-2),	(+1,-2),],  # R->2
+    [( 0, 0),	(-1, 0),	(-1,-1),	( 0,+2),	(-1,+2),],  # 2->R
+    [( 0, 0),	(+1, 0),	(+1,-1),	( 0,+2),	(+1,+2),],  # 2->L
+    [( 0, 0),	(-1, 0),	(-1,+1),	( 0,-2),	(-1,-2),],  # L->2
+    [( 0, 0),	(-1, 0),	(-1,+1),	( 0,-2),	(-1,-2),],  # L->0
+    [( 0, 0),	(+1, 0),	(+1,-1),	( 0,+2),	(+1,+2),],  # 0->L
+    # I and its variants
+    [( 0, 0),	(-2, 0),	(+1, 0),	(-2,+1),	(+1,-2),],  # 0->R
+    [( 0, 0),	(+2, 0),	(-1, 0),	(+2,-1),	(-1,+2),],  # R->0
+    [( 0, 0),	(-1, 0),	(+2, 0),	(-1,-2),	(+2,+1),],  # R->2
+    [( 0, 0),	(+1, 0),	(-2, 0),	(+1,+2),	(-2,-1),],  # 2->R
+    [( 0, 0),	(+2, 0),	(-1, 0),	(+2,-1),	(-1,+2),],  # 2->L
+    [( 0, 0),	(-2, 0),	(+1, 0),	(-2,+1),	(+1,-2),],  # L->2
+    [( 0, 0),	(+1, 0),	(-2, 0),	(+1,+2),	(-2,-1),],  # L->0
+    [( 0, 0),	(-1, 0),	(+2, 0),	(-1,-2),	(+2,+1),],  # 0->L
+    # O and its variants
+    [( 0, 0),],
+    # Others
+    [( 0, 0),   (-1, 0),    ( 0,-1),    (-1,-1),    ( 0,-2),    (-1,-2),],  # Clockwise
+    [( 0, 0),   (+1, 0),    ( 0,-1),    (+1,-1),    ( 0,-2),    (+1,-2),],  # Counterclockwise
+    ]
+
+# Return the list of translations to attempt when rotating a tetrimino with the given ID and rotation counterclockwise or clockwise by inputting 1 or -1.
+def get_translations(number, rotation, direction):
+    if number is None:
+        id_group = None
+    else:
+        id_group = int(np.floor(number / 100) * 100)
+    if id_group in np.array(id_classic)[[1, 2, 4, 5, 6]]:
+        if rotation == 0 and direction == -1:
+            translations = translations_all[0]
+        elif rotation == 0 and direction == 1:
+            translations = translations_all[7]
+        elif rotation == 90 and direction == -1:
+            translations = translations_all[6]
+        elif rotation == 90 and direction == 1:
+            translations = translations_all[5]
+        elif rotation == 180 and direction == -1:
+            translations = translations_all[4]
+        elif rotation == 180 and direction == 1:
+            translations = translations_all[3]
+        elif rotation == 270 and direction == -1:
+            translations = translations_all[2]
+        elif rotation == 270 and direction == 1:
+            translations = translations_all[1]
+    elif id_group == id_classic[0]:
+        if rotation == 0 and direction == -1:
+            translations = translations_all[8]
+        elif rotation == 0 and direction == 1:
+            translations = translations_all[15]
+        elif rotation == 90 and direction == -1:
+            translations = translations_all[14]
+        elif rotation == 90 and direction == 1:
+            translations = translations_all[13]
+        elif rotation == 180 and direction == -1:
+            translations = translations_all[12]
+        elif rotation == 180 and direction == 1:
+            translations = translations_all[11]
+        elif rotation == 270 and direction == -1:
+            translations = translations_all[10]
+        elif rotation == 270 and direction == 1:
+            translations = translations_all[9]
+    elif id_group == id_classic[3]:
+        translations = translations_all[16]
+    else:
+        if direction == -1:
+            translations = translations_all[18]
+        else:
+            translations = translations_all[17]
+    return translations
+
+# Store the arrays and masks for each rotation of each tetrimino that always has the same shape, with keys (ID, rotation). Arrays are shared and must not be modified.
+tetriminos_rotated = {}
+# Define the values that replace the blocks of ghost and heavy tetriminos, and store the arrays of each rotation of each tetrimino that always has the same shape in each of these colors, with keys (ID, rotation, value). Arrays are shared and must not be modified.
+colors_override = [901, 902]
+tetriminos_colored = {}
+# Store the translations to attempt for each rotation, with keys (ID, rotation, direction).
+translations_rotation = {}
+for number in id_classic + id_advanced:
+    for rotation in [0, 90, 180, 270]:
+        for direction in [1, -1]:
+            translations_rotation[(number, rotation, direction)] = get_translations(number, rotation, direction)
+        if number not in [801, 899]:
+            tetrimino = np.rot90(create_template(number), k=rotation//90).copy()
+            tetrimino.flags.writeable = False
+            tetriminos_rotated[(number, rotation)] = (tetrimino, create_masks(tetrimino))
+            for color in colors_override:
+                tetrimino_colored = np.where(tetrimino > 0, color, tetrimino)
+                tetrimino_colored.flags.writeable = False
+                tetriminos_colored[(number, rotation, color)] = tetrimino_colored
+
+# Return the shared array of the tetrimino with the given ID and rotation in the given color, or in its own colors by inputting 0.
+def get_template(number, rotation, color=0):
+    if color == 0:
+        return tetriminos_rotated[(number, rotation)][0]
+    return tetriminos_colored[(number, rotation, color)]
+
+# Return the color of the shared array of the tetrimino with the given ID and rotation if it is the given array, with 0 for its own colors, or None if the given array is not shared.
+def find_color(number, tetrimino, rotation):
+    if (number, rotation) not in tetriminos_rotated:
+        return None
+    if tetrimino is tetriminos_rotated[(number, rotation)][0]:
+        return 0
+    for color in colors_override:
+        if tetrimino is tetriminos_colored[(number, rotation, color)]:
+            return color
+    return None
+
+# Return a tetrimino array with the blocks of the given tetrimino with the given ID and rotation replaced by the given color, using the shared array if the tetrimino always has the same shape.
+def color_tetrimino(number, tetrimino, rotation, color):
+    if find_color(number, tetrimino, rotation) is not None:
+        return get_template(number, rotation, color)
+    return np.where(tetrimino > 0, color, tetrimino)
+
+# Return the array and masks of a tetrimino with the given ID, array, and rotation after rotating it counterclockwise or clockwise by inputting 1 or -1.
+def rotate_tetrimino(number, tetrimino, rotation, direction):
+    rotation_new = (rotation + 90*direction) % 360
+    if (number, rotation_new) in tetriminos_rotated:
+        masks = tetriminos_rotated[(number, rotation_new)][1]
+        # Use the shared array in the same color if the tetrimino is shared.
+        color = find_color(number, tetrimino, rotation)
+        if color is not None:
+            return get_template(number, rotation_new, color), masks
+        return np.rot90(tetrimino, k=direction), masks
+    tetrimino = np.rot90(tetrimino, k=direction)
+    return tetrimino, create_masks(tetrimino)
+
+# Return the position (row, column) of a rotated tetrimino with the given masks that was at the given position before rotating, or None if every translation is blocked. Ghost tetriminos always rotate in place.
+def rotate_position(rows_stack, column_count, masks_rotated, translations, row, column, flag_ghost=False):
+    top, bottom, left, right = masks_rotated[1]
+    # Shift the rotated tetrimino to prevent it from moving outside the left, right, top, bottom walls.
+    if not flag_ghost:
+        if column + left < 0:
+            column = -left
+        if column + right > column_count-1:
+            column = column_count-1 - right
+    if row + top < 0:
+        row = -top
+    if row + bottom > len(rows_stack)-1:
+        row = len(rows_stack)-1 - bottom
+    # Check whether the translated tetrimino is outside the walls or intersects already placed blocks.
+    for translation in translations:
+        if flag_ghost or not check_collision(rows_stack, column_count, masks_rotated, row+translation[1], column+translation[0]):
+            return row + translation[1], column + translation[0]
+    return None
+
+
+# =============================================================================
+# AI.
+# =============================================================================
+# Return a list of (rotation, column, row, masks) tuples for every position a tetrimino can be hard dropped into, by rotating counterclockwise from its initial position, then moving left or right. Ghost tetriminos lock in place, and heavy tetriminos drop to the bottom.
+def enumerate_placements(rows_stack, column_count, number, tetrimino, masks, rotation, row, column, flag_ghost=False, flag_heavy=False):
+    placements = []
+    cells_placed = set()
+    for count in range(4):
+        # Rotate counterclockwise.
+        if count > 0:
+            tetrimino, masks_rotated = rotate_tetrimino(number, tetrimino, rotation, 1)
+            translations = translations_rotation.get((number, rotation, 1), translations_all[17])
+            position = rotate_position(rows_stack, column_count, masks_rotated, translations, row, column, flag_ghost)
+            if position is None:
+                break
+            (row, column), masks, rotation = position, masks_rotated, (rotation + 90) % 360
+        # Move left and right as far as possible.
+        columns = [column]
+        for direction in [-1, 1]:
+            column_next = column + direction
+            if flag_ghost:
+                columns += [(column + direction*i) % column_count for i in range(1, column_count)]
+            else:
+                while not check_collision(rows_stack, column_count, masks, row, column_next):
+                    columns.append(column_next)
+                    column_next += direction
+        # Hard drop.
+        _, (top, bottom, left, right), _ = masks
+        for column_drop in columns:
+            if flag_ghost:
+                row_drop = row
+            elif flag_heavy:
+                row_drop = len(rows_stack)-1 - bottom
+            else:
+                row_drop = row
+                while not check_collision(rows_stack, column_count, masks, row_drop+1, column_drop):
+                    row_drop += 1
+            # Skip placements that occupy the same blocks as previous placements, such as from rotating symmetric tetriminos.
+            cells = (row_drop, (column_drop + left) % column_count, tuple(mask for _, mask in masks[0]), top)
+            if cells not in cells_placed:
+                cells_placed.add(cells)
+                placements.append((rotation, column_drop, row_drop, masks))
+    return placements
+
+# Return a new bitboard with a tetrimino with the given masks inserted at the given position and full lines cleared, and the number of cleared lines.
+def place_tetrimino(rows_stack, column_count, masks, row, column):
+    rows = list(rows_stack)
+    for index, mask in masks[0]:
+        if column >= 0:
+            mask <<= column
+        else:
+            mask >>= -column
+        rows[row+index] |= (mask | (mask >> column_count)) & ((1 << column_count) - 1)
+    rows_kept = [mask for mask in rows if mask != (1 << column_count) - 1]
+    line_count = len(rows) - len(rows_kept)
+    return [0] * line_count + rows_kept, line_count
+
+# Return the effectiveness of hard dropping a tetrimino with the given masks into the given position of a bitboard with the given features, scored with the given weights, which is higher for better moves. Heavy tetriminos destroy placed blocks above them.
+def evaluate_placement(features, masks, row, column, weights, flag_heavy=False):
+    row_count = features.row_count
+    masks, (top, bottom, _, _), bottoms = masks
+    features_heavy = features
+    if flag_heavy:
+        rows = list(features.rows_stack)
+        for column_bottom, row_bottom in bottoms:
+            bit = 1 << ((column + column_bottom) % features.column_count)
+            for index in range(row + row_bottom):
+                rows[index] &= ~bit
+        features_heavy = BoardFeatures(rows, features.column_count)
+    # Calculate the number of cleared lines and the number of holes after inserting the tetrimino.
+    placed = features_heavy.place(masks, row, column)
+
+    # Initialize the effectiveness value.
+    effectiveness = 0
+    # Add points for cleared lines.
+    effectiveness += weights['lines'] * placed['lines']
+    # Subtract points for height of placed tetrimino, based on its top square and its lowest square.
+    effectiveness += weights['top'] * (row_count - (row + top))
+    effectiveness += weights['bottom'] * (row_count-1 - (row + bottom))
+    # Subtract points for occupying the top row.
+    if placed['height'] == row_count:
+        effectiveness += weights['top_row']
+    # Subtract points for creating holes.
+    if placed['holes'] > features.holes:
+        effectiveness += weights['holes'] * abs(placed['holes'] - features.holes)
+    return effectiveness
+
+# Return the move (hold, rotation, column) with the highest effectiveness by inputting a snapshot of a game created by Tetron.ai_snapshot, selecting randomly using the seed in the snapshot if multiple moves have the maximum effectiveness. Searches ahead with search_move if the snapshot contains search settings. Only uses the snapshot so that it can run in a worker process.
+def decide_move(snapshot):
+    rows_stack, column_count, current, held, flag_ghost, flag_heavy, seed, nexts, nexts_held, weights_greedy, search = snapshot
+    if search is not None and not flag_ghost and not flag_heavy:
+        return search_move(snapshot)
+    features = BoardFeatures(rows_stack, column_count)
+    evaluations = []
+    # Evaluate the current tetrimino.
+    number, tetrimino, masks, rotation_current, row, column_current = current
+    for rotation, column, row, masks in enumerate_placements(rows_stack, column_count, number, tetrimino, masks, rotation_current, row, column_current, flag_ghost, flag_heavy):
+        effectiveness = evaluate_placement(features, masks, row, column, weights_greedy, flag_heavy)
+        evaluations.append((False, rotation, column, effectiveness))
+    # Evaluate the tetrimino that would be taken out of the hold queue.
+    if held is not None:
+        number, tetrimino, masks, rotation = held
+        column = int(np.floor((column_count-tetrimino.shape[1])/2))
+        for rotation, column, row, masks in enumerate_placements(rows_stack, column_count, number, tetrimino, masks, rotation, 0, column):
+            effectiveness = evaluate_placement(features, masks, row, column, weights_greedy)
+            evaluations.append((True, rotation, column, effectiveness))
+    # Stay in place if no placements are possible.
+    if len(evaluations) == 0:
+        return (False, rotation_current, column_current)
+    # Select a move randomly if multiple moves have the maximum effectiveness value.
+    effectiveness = max([i[3] for i in evaluations])
+    return random.Random(seed).choice([i[:3] for i in evaluations if i[3] == effectiveness])
+
+# Return the move (hold, rotation, column) that leads to the best bitboard after placing the current tetrimino, or the tetrimino taken out of the hold queue, followed by the tetriminos in the next queue, by inputting a snapshot of a game created by Tetron.ai_snapshot. Only the placements with the highest scores at each tetrimino are searched further. Searches one tetrimino deeper at a time until reaching the lookahead or the time budget, or until the given event is set.
+def search_move(snapshot, event_stop=None):
+    rows_stack, column_count, current, held, _, _, seed, nexts, nexts_held, _, search = snapshot
+    lookahead, beam_width, budget, weights = search
+    time_end = None if budget is None else time.perf_counter() + budget/1000
+    row_count = len(rows_stack)
+
+    # Return a list of states, each a tuple (score, cleared lines, bitboard, first move, next tetriminos), after each placement of a tetrimino into the bitboard of a state.
+    def expand(state, number, tetrimino, masks, rotation, row, column, move_hold, tetriminos_next):
+        _, line_total, rows, move, _ = state
+        features = BoardFeatures(rows, column_count)
+        states = []
+        for rotation_placed, column_placed, row_placed, masks_placed in enumerate_placements(rows, column_count, number, tetrimino, masks, rotation, row, column):
+            placed = features.place(masks_placed[0], row_placed, column_placed, flag_shape=True)
+            # Score the bitboard before clearing lines, adding the lines cleared by previous placements, and avoid occupying the top row.
+            score = weights['lines'] * (line_total + placed['lines']) + sum([weight * placed[name] for name, weight in weights.items() if name != 'lines'])
+            if placed['height'] == row_count:
+                score -= 1000
+            rows_placed, line_count = place_tetrimino(rows, column_count, masks_placed, row_placed, column_placed)
+            states.append((score, line_total + line_count, rows_placed, move or (move_hold, rotation_placed, column_placed), tetriminos_next))
+        return states
+
+    # Place the current tetrimino or the tetrimino taken out of the hold queue.
+    state = (0, 0, rows_stack, None, None)
+    number, tetrimino, masks, rotation_current, row, column_current = current
+    states = expand(state, number, tetrimino, masks, rotation_current, row, column_current, False, nexts[:lookahead])
+    if held is not None:
+        number, tetrimino, masks, rotation = held
+        states += expand(state, number, tetrimino, masks, rotation, 0, int(np.floor((column_count-tetrimino.shape[1])/2)), True, nexts_held[:lookahead])
+    # Stay in place if no placements are possible.
+    if len(states) == 0:
+        return (False, rotation_current, column_current)
+
+    # Place each tetrimino in the next queue in the best states found so far.
+    while True:
+        states.sort(key=lambda state: state[0], reverse=True)
+        beam = states[:beam_width]
+        if all([len(state[4]) == 0 for state in beam]):
+            break
+        states = []
+        for state in beam:
+            if len(state[4]) == 0:
+                continue
+            number, tetrimino, masks, rotation = state[4][0]
+            column = int(np.floor((column_count-tetrimino.shape[1])/2))
+            if check_collision(state[2], column_count, masks, 0, column):
+                continue
+            states += expand(state, number, tetrimino, masks, rotation, 0, column, False, state[4][1:])
+            # Let other threads run between placements when searching on a background thread.
+            if event_stop is not None:
+                time.sleep(0)
+            if (time_end is not None and time.perf_counter() > time_end) or (event_stop is not None and event_stop.is_set()):
+                states = []
+                break
+        # Use the best states of the previous tetrimino if every state lost or the time budget ran out.
+        if len(states) == 0:
+            states = beam
+            break
+
+    # Select a move randomly if multiple moves lead to the maximum score.
+    score = max([state[0] for state in states])
+    return random.Random(seed).choice(sorted(set([state[3] for state in states if state[0] == score])))
+
+
+# =============================================================================
+# Batches.
+# =============================================================================
+# Store the cells of each rotation of each tetrimino that always has the same shape as an array of rows, columns, and values, with keys (ID, rotation). Cells are padded to the same count by repeating the first cell, so that tetriminos with different numbers of blocks can be stacked into one array.
+cell_count = max([np.count_nonzero(tetrimino > 0) for tetrimino, _ in tetriminos_rotated.values()])
+cells_rotated = {}
+for key, (tetrimino, _) in tetriminos_rotated.items():
+    rows, columns = np.nonzero(tetrimino > 0)
+    cells = np.array([rows, columns, tetrimino[rows, columns]], dtype=int)
+    cells_rotated[key] = np.pad(cells, ((0,0), (0,cell_count-cells.shape[1])), mode='edge')
+
+# Return the number of rows each tetrimino in a batch can fall, by inputting the stacked Boolean arrays of occupied blocks and the stacked rows and columns of the cells of each tetrimino.
+def calculate_distances(occupied, rows, columns):
+    row_count = occupied.shape[1]
+    # Get the column of each cell in each matrix, with shape (games, cells, rows).
+    profiles = occupied[np.arange(occupied.shape[0])[:, None], :, columns]
+    # Find the highest occupied block below each cell.
+    blocked = profiles & (np.arange(row_count) > rows[:, :, None])
+    highest = np.where(np.any(blocked, axis=2), np.argmax(blocked, axis=2), row_count)
+    return np.min(highest - rows - 1, axis=1)
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that stores a tetrimino in the hold or next queue as its ID, rotation, and color, using the shared array of tetriminos that always have the same shape instead of storing an array. Only random tetriminos, zombie tetriminos, and other tetriminos whose arrays are not shared store their own arrays.
+class Piece:
+    __slots__ = ['number', 'rotation', 'color', 'tetrimino']
+
+    # Initialize the attributes of the instance of this class by inputting the ID, the rotation, the color with 0 for its own colors, and the array if it is not shared, or None if the tetrimino always has the same shape or is only created when taken out of the queue.
+    def __init__(self, number, rotation=0, color=0, tetrimino=None):
+        self.number = number
+        self.rotation = rotation
+        self.color = color
+        self.tetrimino = tetrimino
+
+    # Return the array of the tetrimino, or None if it is only created when taken out of the queue.
+    def get_tetrimino(self):
+        if self.tetrimino is None and (self.number, self.rotation) in tetriminos_rotated:
+            return get_template(self.number, self.rotation, self.color)
+        return self.tetrimino
+
+    # Return the masks of the tetrimino, or None if it is only created when taken out of the queue.
+    def get_masks(self):
+        if (self.number, self.rotation) in tetriminos_rotated:
+            return tetriminos_rotated[(self.number, self.rotation)][1]
+        if self.tetrimino is not None:
+            return create_masks(self.tetrimino)
+        return None
+
+# Return a piece storing a tetrimino with the given ID, array, and rotation, storing the array only if it is not shared. Input None for the array of tetriminos that are only created when taken out of the queue.
+def create_piece(number, tetrimino, rotation):
+    color = find_color(number, tetrimino, rotation) if tetrimino is not None else None
+    if color is None:
+        return Piece(number, rotation, 0, tetrimino)
+    return Piece(number, rotation, color)
+
+
+# A class that stores the rows of a matrix inside a taller buffer, so that rows can be cleared or added at the bottom by moving the position of the matrix within the buffer and copying only the rows below, instead of creating a new array. The matrix is a view of the buffer, which changes whenever rows are cleared or added.
+class RowBuffer:
+    # Initialize the attributes of the instance of this class by inputting the numbers of rows and columns of the matrix.
+    def __init__(self, row_count, column_count):
+        self.row_count = row_count
+        # Create the buffer with as many spare rows above and below the matrix as the matrix has, and the index of the top row of the matrix in the buffer.
+        self.buffer = np.zeros([3*row_count, column_count])
+        self.base = row_count
+        self.matrix = self.buffer[self.base:self.base+self.row_count]
+
+    # Move the matrix to the middle of the buffer.
+    def recenter(self):
+        self.buffer[self.row_count:2*self.row_count] = self.matrix
+        self.base = self.row_count
+        self.matrix = self.buffer[self.base:self.base+self.row_count]
+
+    # Remove the rows with the given indices, in increasing order, and add empty rows at the top. Rows below the highest removed row are moved up over the removed rows, then the matrix is moved down in the buffer to include empty rows above it.
+    def clear_rows(self, rows):
+        count = len(rows)
+        if count == 0:
+            return
+        if self.base < count:
+            self.recenter()
+        # Move each group of rows between removed rows up by the number of rows removed above it.
+        for index, row in enumerate(rows):
+            end = rows[index+1] if index+1 < count else self.row_count
+            self.matrix[row-index:end-index-1] = self.matrix[row+1:end]
+        self.base -= count
+        self.matrix = self.buffer[self.base:self.base+self.row_count]
+        self.matrix[:count] = 0
+
+    # Add the given number of rows at the bottom, removing the same number of rows from the top, and return the added rows to be filled.
+    def add_rows(self, count):
+        if self.base + self.row_count + count > self.buffer.shape[0]:
+            self.recenter()
+        self.base += count
+        self.matrix = self.buffer[self.base:self.base+self.row_count]
+        return self.matrix[self.row_count-count:]
+
+    # Remove all rows.
+    def clear(self):
+        self.matrix[:] = 0
+
+    # Return the attributes saved when pickling, without the matrix, which is a view of the buffer.
+    def __getstate__(self):
+        state = dict(vars(self))
+        del state['matrix']
+        return state
+
+    # Restore the attributes saved when pickling, and create the matrix as a view of the buffer again.
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self.matrix = self.buffer[self.base:self.base+self.row_count]
+
+
+# A class that decides a move from a snapshot of a game created by Tetron.ai_snapshot. A move is decided quickly without searching ahead, then replaced by the move found by searching one more tetrimino ahead each time a search finishes, until stopped or until every tetrimino in the next queue is searched. Run by SearchThread.
+class AnytimeSearch:
+    # Initialize the attributes of the instance of this class by inputting a snapshot.
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        # Initialize the best move found so far as a tuple (hold, rotation, column), or None before the first move is decided, and the number of tetriminos searched ahead to find it.
+        self.decision = None
+        self.lookahead = 0
+        self.event_stop = threading.Event()
+
+    # Decide moves until stopped.
+    def run(self):
+        _, _, _, _, flag_ghost, flag_heavy, _, nexts, _, _, search = self.snapshot
+        self.decision = decide_move(self.snapshot[:-1] + (None,))
+        if search is None or flag_ghost or flag_heavy:
+            return
+        _, beam_width, _, weights = search
+        for lookahead in range(1, len(nexts)+1):
+            decision = search_move(self.snapshot[:-1] + ((lookahead, beam_width, None, weights),), self.event_stop)
+            # Discard the search if it was stopped before finishing.
+            if self.event_stop.is_set():
+                return
+            self.decision = decision
+            self.lookahead = lookahead
+
+    # Stop searching and return the best move found so far.
+    def stop(self):
+        self.event_stop.set()
+        return self.decision
+
+
+# A class that runs searches for AI moves one at a time, in the order they were submitted, on a background thread. Using one thread for all games leaves the main loop competing with only one other thread.
+class SearchThread:
+    # Initialize the attributes of the instance of this class and start the thread.
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # Start searching from the given snapshot after the searches submitted before it, and return the search, which contains the best move found so far.
+    def submit(self, snapshot):
+        search = AnytimeSearch(snapshot)
+        self.queue.put(search)
+        return search
+
+    # Run each submitted search that has not been stopped, until closed.
+    def run(self):
+        while True:
+            search = self.queue.get()
+            if search is None:
+                return
+            if not search.event_stop.is_set():
+                search.run()
+
+    # Stop the thread after the current search.
+    def close(self):
+        self.queue.put(None)
+
+
+# The main class that controls an instance of a game and contains gameplay actions such as moving and rotating blocks.
+class Tetron:
+    # The names of attributes that are not saved in the state of a game.
+    names_state_excluded = ['games', 'ai_future', 'ai_search']
+
+    # Initialize the attributes of the instance of of this class when it is first created.
+    def __init__(self, is_player, instance_self, games):
+        self.is_player = is_player
+        self.instance_self = instance_self
+        self.games = games
+
+        # Initialize attributes.
+        self.initialize()
+
+    # Initialize values of attributes that are both modified during the game and reset when starting the game. Called on first startup and subsequent game starts.
+    def initialize(self):
+        # Initialize flags indicating statuses of the game.
+        self.flag_playing = False
+        self.flag_paused = False
+        self.flag_lose = False
+
+        self.flag_advancing = True
+        self.flag_landed = False
+        self.flag_hold = False
+        self.flag_tspin = False
+        self.flag_tspin_mini = False
+        self.flag_fast_fall = False
+        self.flag_harddrop = False
+        self.flag_softdropping = False
+        self.flag_perfect = False
+        self.reset_special(reset_all=True)
+        
+        self.flag_put_garbage = False
+
+        # Initialize the decided move, the pending result of deciding in a worker process, and the search on a background thread.
+        self.ai_decision = None
+        self.ai_future = None
+        self.ai_search = None
+        # Initialize the decision time.
+        self.ai_time_evaluate = 0
+        # Initialize the decision duration.
+        self.ai_delay = 0
+
+        # Initialize arrays for current tetrimino, dropped blocks, and highlighted blocks showing where tetriminos will be hard dropped.
+        self.array_current = np.zeros([self.games.row_count, self.games.column_count])
+        self.stack = RowBuffer(self.games.row_count, self.games.column_count)
+        self.array_stack = self.stack.matrix
+        self.array_highlight = np.zeros([self.games.row_count, self.games.column_count])
+        # Initialize the bitboard of dropped blocks, containing one integer per row with bit j set if column j is occupied.
+        self.rows_stack = [0] * self.games.row_count
+        # Initialize the index of the highest row with a dropped block in each column, used to calculate how far tetriminos can fall.
+        self.tops = [self.games.row_count] * self.games.column_count
+        # Initialize the position (row, column) of the top left corner of the current tetrimino array in the matrix, and the number of rows it can be hard dropped.
+        self.row_current = 0
+        self.column_current = 0
+        self.distance_drop = 0
+
+        # Initialize the list with Booleans indicating which special effects have been used to prevent duplicates.
+        self.used_special = [False] * len(id_special)
+        # Initialize the current tetrimino ID.
+        self.id_current = 0
+        # Initialize the hold queue.
+        self.queue_hold = []
+        # Initialize the next queue.
+        self.queue_next = []
+        # Initialize the garbage queue.
+        self.queue_garbage = []
+        # Initialize time when current garbage was received.
+        self.time_receive_garbage = self.games.time_current + 0
+
+        # Initialize the score.
+        self.score = 0
+        # Initialize the score increment queue.
+        self.score_increment = []
+        # Initialize the number of placed tetriminos.
+        self.count = 0
+        # Initialize the number of successive line clears.
+        self.combos = 0
+
+        # Initialize the block fall speed, the probability of getting an advanced tetrimino, and the probability of getting a special effect.
+        self.update_difficulty()
+
+        # Create separate random number generators for selecting tetriminos, special effects, shapes of random and zombie tetriminos, empty columns in garbage, targets, and AI moves and delays.
+        name = '{}{}'.format('player' if self.is_player else 'ai', self.instance_self)
+        self.random_pieces = create_random(self.games, name, 'pieces')
+        self.random_special = create_random(self.games, name, 'special')
+        self.random_shapes = create_random(self.games, name, 'shapes')
+        self.random_garbage = create_random(self.games, name, 'garbage')
+        self.random_target = create_random(self.games, name, 'target')
+        self.random_ai = create_random(self.games, name, 'ai')
+        # Create the randomizer that selects tetriminos.
+        self.randomizer = strategies[self.games.randomizer]([id_classic, id_advanced], self.random_pieces)
+
+    # Start the game.
+    def start_game(self):
+        # Reset attributes.
+        self.initialize()
+        self.reset_time_fall()
+        # Set flags.
+        self.flag_playing = True
+        # Select a target.
+        self.select_target()
+        # Generate the next queue and set the new tetrimino.
+        self.add_next(next_count)
+        self.set_tetrimino()
+    
+    # Pause or resume the game.
+    def pause_game(self):
+        # Resume game.
+        if self.flag_paused:
+            self.flag_playing = True
+            self.flag_paused = False
+        # Pause game.
+        else:
+            self.flag_playing = False
+            self.flag_paused = True
+    
+    # Stop the game.
+    def stop_game(self):
+        # Set flags.
+        self.flag_playing = False
+        self.flag_paused = False
+        self.reset_special(reset_all=True)
+        # Empty queues.
+        self.queue_hold = []
+        self.queue_next = []
+        self.queue_garbage = []
+        self.ai_stop_search()
+        # Update display.
+        self.update()
+
+    # Randomly generate the next tetriminos and add them to the next queue.
+    def add_next(self, count=1):
+        # Select the tetriminos with the randomizer, using the current probability of getting an advanced tetrimino.
+        for id_selected in self.randomizer.generate(count, self.weight_advanced):
+            # Create the arrays of random tetriminos. Tetriminos that always have the same shape use shared arrays, and freebie tetriminos are created when taken out of the queue.
+            if id_selected in [801]:
+                self.queue_next.append(Piece(id_selected, 0, 0, self.create_tetrimino(id_selected)))
+            else:
+                self.queue_next.append(Piece(id_selected))
+        # Draw next queue.
+        self.draw_next()
+    
+    # Create and return a tetrimino array.
+    def create_tetrimino(self, number):
+        # Zombie tetrimino.
+        if self.flag_zombie:
+            width = self.random_shapes.choice([2, 3])
+            height = self.random_shapes.choice([1, 2, 3])
+            # Select the left column from those where the tetrimino would contain placed blocks.
+            left = self.random_shapes.choice([column for column in range(self.games.column_count-width+1) if np.any(self.array_stack[:, column:column+width] > 0)])
+            right = left + width
+            top = np.argmax(np.any(self.array_stack[:, left:right] > 0, axis=1))
+            bottom = max(np.argmax(self.array_stack[:, left:right] > 0, axis=0)) + 1
+            if bottom - top != height:
+                bottom = min([self.games.row_count, top+height])
+            tetrimino = np.copy(self.array_stack[top:bottom, left:right])
+            tetrimino[tetrimino <= 0] = -1
+            tetrimino[tetrimino > 0] = 906
+            self.array_stack[top:bottom, left:right] = 0
+            # Make the tetrimino square.
+            if (bottom-top) != (right-left):
+                difference = (bottom-top) - (right-left)
+                if difference < 0:
+                    if bottom + abs(difference) > self.games.row_count:
+                        top -= abs(difference)
+                        tetrimino = np.concatenate((-1*np.ones([abs(difference),tetrimino.shape[1]]), tetrimino), axis=0)
+                    else:
+                        bottom += abs(difference)
+                        tetrimino = np.concatenate((tetrimino, -1*np.ones([abs(difference),tetrimino.shape[1]])), axis=0)
+                elif difference > 0:
+                    if right + abs(difference) > self.games.column_count:
+                        left -= abs(difference)
+                        tetrimino = np.concatenate((-1*np.ones([tetrimino.shape[0],abs(difference)]), tetrimino), axis=1)
+                    else:
+                        right += abs(difference)
+                        tetrimino = np.concatenate((tetrimino, -1*np.ones([tetrimino.shape[0],abs(difference)])), axis=1)
+            # Record the position of the tetrimino and update the bitboard for the removed blocks.
+            self.row_current, self.column_current = int(top), int(left)
+            self.update_rows_stack()
+        else:
+            if number == 801:  # Random 3x3
+                shape = [3, 3]
+                count = self.random_shapes.choice([3, 4, 5])
+                random_indices = self.random_shapes.sample(range(np.prod(shape)), count)
+                tetrimino = -1 * np.ones(shape)
+                tetrimino[np.unravel_index(random_indices, shape)] = number
+            elif number == 899:  # Freebie
+                # Index of highest row containing dropped blocks.
+                index_highest = np.argmax(np.any(self.array_stack > 0, axis=1))
+                # Index of lowest row that can fit this tetrimino.
+                index_lowest = max(np.argmax(self.array_stack, axis=0))
+                # Get the top rows of the dropped blocks.
+                tetrimino = np.copy(self.array_stack[index_highest:index_lowest+1, :]) > 0
+                # Get the row indices of the highest blocks in each column of the dropped blocks array, with values of -1 for empty columns.
+                rows_highest = np.argmax(tetrimino, axis=0)
+                rows_highest[np.all(tetrimino == 0, axis=0)] = -1
+                # Fill the blocks below the highest blocks in each column.
+                for column, row in enumerate(rows_highest):
+                    if row >= 0:
+                        tetrimino[row:, column] = 1
+                # Create the tetrimino by inverting the dropped blocks.
+                tetrimino = number * (1 - tetrimino)
+                # Replace all values of 0 with -1.
+                tetrimino[tetrimino == 0] = -1
+            # Tetriminos with fixed shapes.
+            else:
+                tetrimino = tetriminos_rotated[(number, 0)][0]
+        return tetrimino
+    
+    # Get the first tetrimino in the next queue, or the given piece taken out of the hold queue, and use it as the current.
+    def set_tetrimino(self, hold_data=None):
+        # Randomly select a special property after selecting whether to use a special effect.
+        if self.random_special.choices([True, False], [self.weight_special, 1-self.weight_special], k=1)[0]:
+            effect_special = self.random_special.choice([id_special[i] for i in range(len(id_special)) if not self.used_special[i]])
+            self.used_special[id_special.index(effect_special)] = True
+            # Reset all values in the list to False.
+            if all(self.used_special):
+                self.used_special = [False] * len(self.used_special)
+            # Apply the special effect.
+            if effect_special == id_special[0]:
+                self.flag_ghost = True
+                self.flag_fast_fall = True
+                if self.is_player:
+                    self.play_sound('special_ghost')
+            elif effect_special == id_special[1]:
+                self.flag_heavy = True
+                self.flag_fast_fall = True
+                if self.is_player:
+                    self.play_sound('special_heavy')
+            elif effect_special == id_special[2]:
+                # Apply the effect only if it is not currently active.
+                if not self.flag_disoriented:
+                    self.flag_disoriented = True
+                    self.time_start_disoriented = self.games.time_current + 0
+                    if self.is_player:
+                        self.play_sound('special_disoriented')
+            elif effect_special == id_special[3]:
+                # Apply the effect only if it is not currently active.
+                if not self.flag_blind:
+                    self.flag_blind = True
+                    self.time_start_blind = self.games.time_current + 0
+                    if self.is_player:
+                        self.play_sound('special_blind')
+            elif effect_special == id_special[4]:
+                self.flag_wind = True
+                self.time_start_wind = self.games.time_current + 0
+                self.wind_direction = self.random_special.choice([1, -1])
+                self.wind_count = 0
+                if self.is_player:
+                    self.play_sound('special_wind')
+            elif effect_special == id_special[5]:
+                # Apply the effect only if there are placed blocks to use and if not taking a block out of hold.
+                if np.any(self.array_stack > 0) and hold_data is None:
+                    self.flag_zombie = True
+                    if self.is_player:
+                        self.play_sound('special_zombie')
+            elif effect_special == id_special[6]:
+                self.flag_fake = True
+        # Get and remove the first piece from the next or hold queue.
+        if self.flag_zombie:
+            piece = Piece(None)
+        else:
+            if hold_data is None:
+                piece = self.queue_next.pop(0)
+                self.add_next()
+            else:
+                piece = hold_data
+        number, rotation = piece.number, piece.rotation
+
+        # Generate any un-generated tetrimino arrays.
+        tetrimino = piece.get_tetrimino()
+        if tetrimino is None:
+            tetrimino = self.create_tetrimino(number)
+        # Apply any special effects to the color of the tetrimino.
+        if self.flag_ghost:
+            tetrimino = color_tetrimino(number, tetrimino, rotation, 901)
+        elif self.flag_heavy:
+            tetrimino = color_tetrimino(number, tetrimino, rotation, 902)
+        
+        # Assign the new data.
+        if (number, rotation) in tetriminos_rotated:
+            self.set_current(tetrimino, tetriminos_rotated[(number, rotation)][1])
+        else:
+            self.set_current(tetrimino)
+        self.id_current = number
+        self.rotation_current = rotation
+
+        if not self.flag_zombie:
+            # Insert the new tetrimino at the top center of the matrix.
+            self.row_current = 0
+            self.column_current = int(np.floor((self.games.column_count-tetrimino.shape[1])/2))
+        # Check for landing.
+        self.check_landed()
+        # Update display.
+        self.update()
+
+        # Record the time for AI.
+        self.ai_time_evaluate = self.games.time_current + 0
+        # Select a delay for this tetrimino.
+        self.ai_delay = self.random_ai.gauss(self.games.ai_delay_mean, self.games.ai_delay_std)
+    
+    # Shift down one line. Return a Boolean indicating whether it was successful.
+    def fall(self):
+        success = False
+        # Zombie tetriminos fall upwards.
+        row = self.row_current + 1*((-1) ** self.flag_zombie)
+        # Determine if the shifted tetrimino is outside the matrix or intersects the stack. Ghost tetriminos only stop at the bottom.
+        if self.flag_ghost:
+            is_blocked = self.check_outside_rows(row)
+        else:
+            is_blocked = self.check_collision(row, self.column_current)
+        # Apply the shift.
+        if not is_blocked:
+            self.row_current = row
+            # Reset the fall timer if the tetrimino has landed.
+            self.check_landed()
+            # Update display.
+            self.update()
+            # Update Boolean.
+            success = True
+        return success
+    
+    # Lock in place. Input True to play the hard drop sound instead of the lock sound.
+    def lock(self, is_harddrop=False):
+        self.games.record('lock', self.instance_self, self.id_current, self.rotation_current, self.row_current, self.column_current)
+        # If a heavy tetrimino, delete placed blocks below the current tetrimino and shift tetrimino to bottom row.
+        if self.flag_heavy:
+            self.array_stack[self.array_highlight < 0] = 0
+            self.row_current += self.distance_drop
+            self.update_rows_stack()
+        # Lock tetrimino.
+        if not self.flag_fake:
+            rows, columns, values = self.get_cells()
+            self.array_stack[rows, columns] = values
+            self.update_rows_stack(rows)
+        # Set flag to hard drop other game instances.
+        self.flag_harddrop = True
+        # Play sound effect.
+        if self.instance_self == 0:
+            if self.is_player:
+                if not self.flag_fake:
+                    if is_harddrop:
+                        self.play_sound('game_harddrop')
+                    else:
+                        self.play_sound('game_lock')
+                else:
+                    self.play_sound('special_fake')
+        self.update()
+
+        # Increment the placed blocks counter.
+        self.count += 1
+
+        # Reset certain flags.
+        self.reset_special(reset_all=False)
+        self.flag_fast_fall = False
+        self.flag_landed = False
+        self.flag_hold = False
+        # Update the values of previously placed special blocks.
+        self.array_stack[self.array_stack == 901] = 900
+        self.array_stack[self.array_stack == 902] = 900
+        self.array_stack[self.array_stack == 906] = 900
+
+        # Check for cleared lines and empty them.
+        row_full = (1 << self.games.column_count) - 1
+        rows_cleared = [row for row, mask in enumerate(self.rows_stack) if mask == row_full]
+        line_count = len(rows_cleared)
+        if line_count > 0:
+            self.stack.clear_rows(rows_cleared)
+            self.array_stack = self.stack.matrix
+            self.rows_stack = [0] * line_count + [mask for mask in self.rows_stack if mask != row_full]
+            self.tops = calculate_tops(self.rows_stack, self.games.column_count)
+        # Increment the combo counter if a line was cleared.
+        if line_count > 0:
+            self.combos += 1
+            # Check for a perfect clear.
+            self.flag_perfect = not any(self.rows_stack)
+        else:
+            self.combos = 0
+
+        # Calculate number of garbage lines.
+        garbage_count = self.calculate_garbage(line_count)
+        # Clear garbage lines if the queue contains any.
+        if len(self.queue_garbage) > 0:
+            self.subtract_garbage(garbage_count)
+        # Send garbage lines if the queue is empty.
+        else:
+            self.send_garbage(garbage_count)
+        # Put garbage in the matrix.
+        if self.flag_put_garbage and garbage_count == 0:
+            self.put_garbage()
+
+        # Put the score increment in the queue.
+        self.score_increment.append(self.calculate_score(line_count))
+        
+        # Reset the previous block fall time.
+        self.reset_time_fall()
+        # Reset the T-spin and perfect clear flags. Must be after calculating score.
+        self.flag_tspin = False
+        self.flag_tspin_mini = False
+        self.flag_perfect = False
+        # Reset attributes for AI.
+        self.ai_decision = None
+        self.ai_future = None
+        self.ai_stop_search()
+        self.ai_time_evaluate = 0
+        
+        # Stop the game or create a new tetrimino.
+        if self.flag_playing:
+            self.check_lose()
+            if not self.flag_lose:
+                self.set_tetrimino()
+
+    # Hard drop.
+    def harddrop(self):
+        if not self.flag_ghost and not self.flag_heavy:
+            self.row_current += self.distance_drop
+        self.lock(is_harddrop=True)
+
+    # Move left. Return a Boolean indicating whether it was successful.
+    def move_left(self):
+        return self.move(-1)
+    
+    # Move right. Return a Boolean indicating whether it was successful.
+    def move_right(self):
+        return self.move(1)
+
+    # Move left or right by inputting -1 or 1. Return a Boolean indicating whether it was successful.
+    def move(self, direction):
+        success = False
+        # Ghost tetriminos pass through walls and placed blocks, wrapping around to the other side of the matrix.
+        if self.flag_ghost:
+            column = (self.column_current + direction) % self.games.column_count
+        else:
+            column = self.column_current + direction
+        # Check if already at the wall or if placed blocks are in the way.
+        if self.flag_ghost or not self.check_collision(self.row_current, column):
+            self.column_current = column
+            # Reset the block fall time if the tetrimino has landed.
+            self.check_landed()
+            # Update display.
+            self.update()
+            # Play sound effect.
+            if self.is_player:
+                self.play_sound('game_move')
+            # Update Boolean.
+            success = True
+        return success
+
+    # Rotate counterclockwise or clockwise by inputting 1 (default) or -1. Return a Boolean indicating whether it was successful.
+    def rotate(self, direction=1):
+        success = False
+        # Get the translations to attempt and the rotated tetrimino.
+        rotation = (self.rotation_current + 90*direction) % 360
+        translations = translations_rotation.get((self.id_current, self.rotation_current, direction), translations_all[17 + (direction == -1)])
+        tetrimino_rotated, masks_rotated = rotate_tetrimino(self.id_current, self.tetrimino, self.rotation_current, direction)
+        # Attempt to rotate for each translation.
+        position = rotate_position(self.rows_stack, self.games.column_count, masks_rotated, translations, self.row_current, self.column_current, self.flag_ghost)
+        if position is not None:
+            self.row_current, self.column_current = position
+            self.set_current(tetrimino_rotated, masks_rotated)
+            # Update the current rotation value.
+            self.rotation_current = rotation
+            # Update display.
+            self.update()
+            # Play sound effect.
+            if self.is_player:
+                self.play_sound('game_rotate')
+            # Reset the block fall time if the tetrimino has landed.
+            self.check_landed()
+            # Reset the T-spin flags.
+            self.flag_tspin = False
+            self.flag_tspin_mini = False
+            # Set flag if T-spin or mini T-spin.
+            if self.id_current == id_classic[5]:
+                front_count = self.count_corners(-2)
+                back_count = self.count_corners(-3)
+                if front_count == 2 and back_count >= 1:
+                    self.flag_tspin = True
+                    self.flag_tspin_mini = False
+                elif front_count >= 1 and back_count == 2:
+                    self.flag_tspin_mini = True
+                    self.flag_tspin = False
+            # Update Boolean.
+            success = True
+        return success
+
+    # Return the number of placed blocks at the corners of the current T tetrimino marked with the given value.
+    def count_corners(self, value):
+        rows, columns = np.nonzero(self.tetrimino == value)
+        rows = rows + self.row_current
+        columns = columns + self.column_current
+        inside = (rows >= 0) & (rows < self.games.row_count) & (columns >= 0) & (columns < self.games.column_count)
+        return int(np.sum(self.array_stack[rows[inside], columns[inside]] > 0))
+
+    # Start soft dropping.
+    def softdrop_start(self):
+        # Shift down one line and check if that caused the block to land.
+        if self.fall() and not self.flag_landed and (speed_softdrop <= self.speed_fall):
+            # Set flags.
+            self.flag_softdropping = True
+            self.flag_advancing = False
+            # Reset the previous block fall time.
+            self.reset_time_fall()
+            # Play sound effect.
+            if self.is_player:
+                self.play_sound('game_softdrop')
+
+    # Stop soft dropping.
+    def softdrop_stop(self):
+        # Set flags.
+        self.flag_softdropping = False
+        self.flag_advancing = True
+        # Reset the previous block fall time.
+        self.reset_time_fall()
+
+    # Hold.
+    def hold(self):
+        # Set the flag to prevent another hold.
+        self.flag_hold = True
+        # Store the current ID, rotation, and array if it is not shared in the hold queue.
+        if self.id_current in [899]:
+            self.tetrimino = None
+        self.queue_hold.append(create_piece(self.id_current, self.tetrimino, self.rotation_current))
+        # Reset some special effects.
+        self.reset_special(reset_all=False)
+        # Set the next tetrimino.
+        if self.games.game_mode != 2:
+            # Create a new tetrimino if nothing was in the queue.
+            if len(self.queue_hold) <= 1:
+                self.set_tetrimino()
+            # Swap the current tetrimino with the one in the queue.
+            else:
+                self.set_tetrimino(self.queue_hold.pop(0))
+        # Play sound effect.
+        if self.instance_self == 0:
+            if self.is_player:
+                self.play_sound('game_hold')
+        # Draw hold queue.
+        self.draw_hold()
+    
+    # Swap.
+    def swap(self, game):
+        # Swap the current tetrimino with one from another game.
+        self.set_tetrimino(game.queue_hold.pop(0))
+
+    # Reset the block fall time if the tetrimino has landed on the stack or on the bottom of the matrix.
+    def check_landed(self):
+        # Zombie tetriminos land on the top of the matrix.
+        row = self.row_current + 1*((-1) ** self.flag_zombie)
+        if (self.flag_ghost and self.check_outside_rows(row)) or (not self.flag_ghost and self.check_collision(row, self.column_current)):
+            self.flag_landed = True
+            self.time_landed = self.games.time_current + 0
+            # If landed while soft dropping, reset block fall time in addition to resetting specific flags.
+            if self.flag_softdropping:
+                self.softdrop_stop()
+            # If landed normally, reset block fall time only.
+            else:
+                self.reset_time_fall()
+            # Play sound effect.
+            if not self.flag_ghost:
+                if self.is_player:
+                    self.play_sound('game_landing')
+        else:
+            self.flag_landed = False
+
+    # Return a Boolean indicating whether the current tetrimino, or the tetrimino with the given masks, is outside the matrix or intersects placed blocks if its top left corner is at the given row and column.
+    def check_collision(self, row, column, masks=None):
+        return check_collision(self.rows_stack, self.games.column_count, masks or self.masks_current, row, column)
+
+    # Return a Boolean indicating whether the current tetrimino is above the top or below the bottom of the matrix if its top left corner is at the given row.
+    def check_outside_rows(self, row):
+        _, (top, bottom, _, _), _ = self.masks_current
+        return row + top < 0 or row + bottom >= self.games.row_count
+
+    # Set the current tetrimino array and its masks.
+    def set_current(self, tetrimino, masks=None):
+        self.tetrimino = tetrimino
+        self.masks_current = masks or create_masks(tetrimino)
+
+    # Return the row indices, column indices, and values of the blocks in the current tetrimino.
+    def get_cells(self):
+        rows, columns = np.nonzero(self.tetrimino > 0)
+        values = self.tetrimino[rows, columns]
+        # Ghost tetriminos can wrap around the left and right walls.
+        return rows + self.row_current, (columns + self.column_current) % self.games.column_count, values
+
+    # Recalculate the bitboard and the highest rows of dropped blocks from the dropped blocks array, only in the given rows if specified.
+    def update_rows_stack(self, rows=None):
+        if rows is None:
+            self.rows_stack = (self.array_stack > 0).dot(1 << np.arange(self.games.column_count)).tolist()
+        else:
+            for row in set(rows.tolist()):
+                self.rows_stack[row] = int((self.array_stack[row] > 0).dot(1 << np.arange(self.games.column_count)))
+        self.tops = calculate_tops(self.rows_stack, self.games.column_count)
+    
+    # Set the flag and stop the game if the top row is occupied.
+    def check_lose(self):
+        if self.rows_stack[0]:
+            self.flag_lose = True
+            if not self.is_player:
+                self.stop_game()
+    
+    # Randomly select a target if playing with AI.
+    def select_target(self):
+        targets = self.games.get_targets(self.instance_self)
+        if len(targets) > 0:
+            self.instance_target = self.random_target.choice(targets)
+        else:
+            self.instance_target = None
+    
+    # Calculate the number of garbage lines to send by inputting the number of lines cleared.
+    def calculate_garbage(self, lines):
+        count = 0
+        if lines == 1:
+            if self.flag_tspin:
+                count = 2
+            elif self.flag_tspin_mini:
+                count = 0
+            else:
+                count = 0
+        elif lines == 2:
+            if self.flag_tspin:
+                count = 4
+            elif self.flag_tspin_mini:
+                count = 1
+            else:
+                count = 1
+        elif lines == 3:
+            if self.flag_tspin:
+                count = 6
+            else:
+                count = 2
+        elif lines >= 4:
+            count = 4
+        # Bonus lines.
+        if self.id_current != 899:
+            # Perfect clear.
+            if self.flag_perfect:
+                count += 4
+            # Combos.
+            if self.combos in [2, 3]:
+                count += 1
+            elif self.combos in [4, 5]:
+                count += 2
+            elif self.combos in [6, 7]:
+                count += 3
+            elif self.combos in [8, 9, 10]:
+                count += 4
+            elif self.combos >= 11:
+                count += 5
+        return count
+
+    # Add garbage to the queue.
+    def add_garbage(self, count):
+        total = sum(self.queue_garbage)
+        max = 12
+        if count > 0:
+            if total == 0:
+                self.time_receive_garbage = self.games.time_current + 0
+            if total + count >= max:
+                self.queue_garbage.append(max-total)
+            else:
+                self.queue_garbage.append(count)
+            # Play sound effect.
+            if self.is_player:
+                if count < 4:
+                    self.play_sound('game_garbage_1')
+                else:
+                    self.play_sound('game_garbage_2')
+        # Draw garbage queue.
+        self.draw_garbage()
+    
+    # Subtract garbage from the queue.
+    def subtract_garbage(self, count):
+        total = sum(self.queue_garbage)
+        if count > 0:
+            if count >= total:
+                self.queue_garbage = []
+            else:
+                while count > 0:
+                    if count < self.queue_garbage[0]:
+                        self.queue_garbage[0] -= count
+                        count = 0
+                    else:
+                        count -= self.queue_garbage.pop(0)
+        # Draw garbage queue.
+        self.draw_garbage()
+
+    # Send garbage to another game.    
+    def send_garbage(self, count):
+        if count > 0:
+            if self.instance_target is not None:
+                self.games.send_garbage(self.instance_target, count)
+
+    # Add garbage lines to the matrix and subtract the corresponding value from the queue.
+    def put_garbage(self):
+        if len(self.queue_garbage) > 0:
+            self.flag_put_garbage = False
+            self.time_receive_garbage = self.games.time_current + 0
+
+            count = self.queue_garbage.pop(0)
+            column = self.random_garbage.choice(range(self.games.column_count))
+            array_garbage = self.stack.add_rows(count)
+            array_garbage[:] = 900
+            array_garbage[:, column] = 0
+            self.array_stack = self.stack.matrix
+            self.rows_stack = self.rows_stack[count:] + [((1 << self.games.column_count) - 1) & ~(1 << column)] * count
+            self.tops = calculate_tops(self.rows_stack, self.games.column_count)
+            self.check_lose()
+
+    # Return the points to add to the score by inputting how many lines were cleared.
+    def calculate_score(self, lines):
+        # Calculate points earned based on the type of line clear.
+        score_increment = 5 * lines
+        if lines >= 4:
+            score_increment = 10 * lines
+        # Calculate points for T-spins.
+        if self.flag_tspin:
+            score_increment = 20 * (lines + 1)
+        elif self.flag_tspin_mini:
+            score_increment = 5 * (2 ** lines)
+        
+        # Calculate point multipliers.
+        multipliers = []
+        if self.combos > 1:
+            # Combo multiplier.
+            if self.id_current != 899:
+                multipliers.append(self.combos)
+                # print('combo multiplier: ', multipliers[-1])
+        if self.flag_perfect:
+            # Perfect clear multiplier.
+            if self.id_current != 899:
+                multipliers.append(lines)
+        
+        # Play a sound corresponding to the number of lines cleared.
+        if self.is_player:
+            if lines == 1:
+                self.play_sound('game_single')
+            elif lines == 2:
+                self.play_sound('game_double')
+            elif lines == 3:
+                self.play_sound('game_triple')
+            elif lines >= 4:
+                self.play_sound('game_tetris')
+            # Play a sound for perfect clears.
+            if self.flag_perfect:
+                self.play_sound('game_perfect')
+            # Play a sound for special line clears.
+            if self.flag_tspin or self.flag_tspin_mini or lines >= 4:
+                self.play_sound('game_special')
+        
+        return int(score_increment * np.prod(multipliers))
+
+    # Update the highlighted array.
+    def update(self):
+        # Reset the values of the array to 0.
+        self.array_highlight[:] = 0
+        # Highlight the area where the current tetrimino will fall if hard dropped.
+        if self.flag_playing:
+            # Insert the current tetrimino into its array.
+            self.array_current[:] = 0
+            rows, columns, values = self.get_cells()
+            self.array_current[rows, columns] = values
+            # Calculate the number of rows the tetrimino can fall, which is limited by the bottom of the matrix and, if not a heavy tetrimino, by the highest placed block below each column of the tetrimino. Below the highest block in a column, such as under an overhang, search the column for the next block instead.
+            _, _, bottoms = self.masks_current
+            self.distance_drop = self.games.row_count
+            for column, row in bottoms:
+                row += self.row_current
+                column = (column + self.column_current) % self.games.column_count
+                if self.flag_heavy:
+                    distance = self.games.row_count-1 - row
+                elif row < self.tops[column]:
+                    distance = self.tops[column] - row - 1
+                else:
+                    distance = self.games.row_count-1 - row
+                    bit = 1 << column
+                    for index in range(row+1, self.games.row_count):
+                        if self.rows_stack[index] & bit:
+                            distance = index - row - 1
+                            break
+                self.distance_drop = min(self.distance_drop, distance)
+            # Mark the blocks where the current tetrimino will fall if hard dropped with negative numbers.
+            if self.flag_heavy:
+                for column, row in bottoms:
+                    row += self.row_current
+                    column = (column + self.column_current) % self.games.column_count
+                    self.array_highlight[row+1:row+1+self.distance_drop, column] = -1
+            else:
+                self.array_highlight[rows+self.distance_drop, columns] = -values
+        # Remove the current tetrimino if not playing.
+        else:
+            self.array_current[:] = 0
+
+    # Update the game difficulty.
+    def update_difficulty(self):
+        # Update the block fall speed.
+        if self.games.flag_classic:
+            self.speed_fall = np.interp(self.score, [0, score_thresholds[-2]], speeds_fall_classic)
+        else:
+            self.speed_fall = np.interp(self.score, [0, score_thresholds[-2]], speeds_fall)
+        # Update the probability of getting an advanced tetrimino.
+        if self.games.flag_classic:
+            self.weight_advanced = 0
+        else:
+            self.weight_advanced = np.interp(self.score, [score_update_chance_advanced, score_thresholds[-2]], weights_advanced)
+        # Update the probability of getting a special effect.
+        if self.games.flag_classic:
+            self.weight_special = 0
+        else:
+            self.weight_special = np.interp(self.score, [score_update_chance_special, score_thresholds[-2]], weights_special)
+
+    # Record the current time to determine when the next block fall occurs.
+    def reset_time_fall(self):
+        self.time_fall = self.games.time_current + 0
+    
+    # Reset some or all special effects.
+    def reset_special(self, reset_all=False):
+        self.flag_ghost = False
+        self.flag_heavy = False
+        self.flag_wind = False
+        self.flag_zombie = False
+        self.flag_fake = False
+        # Duration-based special effects that should not be reset when hard dropping.
+        if reset_all:
+            self.flag_disoriented = False
+            self.flag_blind = False
+
+    # Advance the game to the current time by applying automatic falling, locking, special effects, garbage warnings, and AI moves.
+    def step(self):
+        if not self.flag_playing:
+            return
+        # Let block fall.
+        if self.flag_advancing:
+            if (
+                # Check if the required time for automatic advancing has elapsed.
+                (not self.flag_landed and (self.games.time_current - self.time_fall) >= (self.speed_fall * (speed_fall_multiplier ** self.flag_fast_fall))) or
+                # If tetrimino is landed, check if the maximum time has elapsed.
+                (self.flag_landed and (self.games.time_current - self.time_landed >= duration_max_landed))
+                ):
+                    if not self.fall():
+                        self.lock()
+                    self.reset_time_fall()
+        else:
+            self.reset_time_fall()
+
+        # Apply wind special effect.
+        if self.flag_wind:
+            if self.games.time_current - self.time_start_wind >= speed_wind:
+                self.time_start_wind = self.games.time_current + 0
+                self.wind_count += 1
+                if self.wind_direction > 0:
+                    self.move_right()
+                elif self.wind_direction < 0:
+                    self.move_left()
+                if self.is_player:
+                    self.draw_matrix()
+
+        # Stop the disoriented effect if it has lasted longer than the maximum duration.
+        if self.flag_disoriented:
+            if self.games.time_current - self.time_start_disoriented > duration_disoriented:
+                self.flag_disoriented = False
+                self.draw_matrix()
+        # Stop the blind effect if it has lasted longer than the maximum duration.
+        if self.flag_blind:
+            if self.games.time_current - self.time_start_blind > duration_blind:
+                self.flag_blind = False
+                self.draw_matrix()
+
+        # Garbage queue.
+        if self.games.time_current - self.time_receive_garbage >= time_garbage_warning:
+            self.flag_put_garbage = True
+        else:
+            self.flag_put_garbage = False
+
+        # Process AI games.
+        if not self.is_player:
+            self.ai_evaluate()
+
+    # Play a sound effect. Does nothing without a frontend.
+    def play_sound(self, name):
+        pass
+
+    # Draw each block in the matrix. Does nothing without a frontend.
+    def draw_matrix(self):
+        pass
+
+    # Draw the hold queue. Does nothing without a frontend.
+    def draw_hold(self):
+        pass
+
+    # Draw the next queue. Does nothing without a frontend.
+    def draw_next(self):
+        pass
+
+    # Draw the garbage queue. Does nothing without a frontend.
+    def draw_garbage(self):
+        pass
+
+    # Draw the information text. Does nothing without a frontend.
+    def draw_information(self):
+        pass
+    
+    # Calculate effectiveness of every move, decide on a move, or perform a move.
+    def ai_evaluate(self):
+        # Send a snapshot to a worker process and check for the decision on later steps without waiting for it, start searching on a background thread, or calculate and decide in the main loop.
+        if self.ai_decision is None:
+            if self.games.executor is not None:
+                if self.ai_future is None:
+                    self.ai_future = self.games.executor.submit(decide_move, self.ai_snapshot())
+                elif self.ai_future.done():
+                    self.ai_decision = self.ai_future.result()
+                    self.ai_future = None
+            elif self.games.searcher is not None:
+                if self.ai_search is None:
+                    self.ai_search = self.games.searcher.submit(self.ai_snapshot())
+                self.ai_decision = self.ai_search.decision
+                # Decide in the main loop if the background thread has not decided a move by the time to hard drop.
+                if self.ai_decision is None and (self.games.time_current - self.ai_time_evaluate) >= self.ai_delay:
+                    self.ai_stop_search()
+                    self.ai_decision = self.ai_decide()
+            else:
+                self.ai_decision = self.ai_decide()
+        # Perform.
+        else:
+            # Move towards the best move found so far by the background thread, and stop it when holding, which changes the current tetrimino, or when it is time to hard drop.
+            if self.ai_search is not None:
+                if self.ai_search.decision[0] or (self.games.time_current - self.ai_time_evaluate) >= self.ai_delay:
+                    self.ai_decision = self.ai_search.stop()
+                    self.ai_search = None
+                else:
+                    self.ai_decision = self.ai_search.decision
+            is_hold, rotation, column = self.ai_decision[:3]
+            if is_hold:
+                self.ai_decision = (False, rotation, column)
+                self.ai_perform('hold')
+            elif rotation != self.rotation_current:
+                self.ai_perform('rotate')
+            elif column < self.column_current:
+                self.ai_perform('move_left')
+            elif column > self.column_current:
+                self.ai_perform('move_right')
+            else:
+                if (self.games.time_current - self.ai_time_evaluate) >= self.ai_delay:
+                    self.ai_perform('harddrop')
+
+    # Apply one of the actions in actions_ai, recording it so that replays can apply the same actions instead of deciding moves again.
+    def ai_perform(self, action):
+        self.games.record('ai', self.instance_self, actions_ai.index(action))
+        if action == 'hold':
+            self.hold()
+        elif action == 'rotate':
+            self.rotate(1)
+        elif action == 'move_left':
+            self.move_left()
+        elif action == 'move_right':
+            self.move_right()
+        elif action == 'harddrop':
+            self.harddrop()
+
+    # Stop searching for a move on the background thread.
+    def ai_stop_search(self):
+        if self.ai_search is not None:
+            self.ai_search.stop()
+            self.ai_search = None
+
+    # Calculate the effectiveness of every placement of the current tetrimino and of the tetrimino that would be taken out of the hold queue, and return the selected move as a tuple (hold, rotation, column).
+    def ai_decide(self):
+        return decide_move(self.ai_snapshot())
+
+    # Return a tuple containing the information needed to decide on a move: the bitboard, the current tetrimino, the tetrimino that would be taken out of the hold queue, special effects, a seed for selecting between equally effective moves, the tetriminos in the next queue without and with holding, the weights used when not searching ahead, and the settings for searching ahead, or None to not search ahead.
+    def ai_snapshot(self):
+        current = (self.id_current, self.tetrimino, self.masks_current, self.rotation_current, self.row_current, self.column_current)
+        # Use the tetrimino in the hold queue, or the next tetrimino if the hold queue is empty.
+        held = None
+        nexts = self.get_tetriminos_next()
+        nexts_held = nexts
+        if not any([self.flag_hold, self.flag_ghost, self.flag_heavy, self.flag_zombie]) and self.games.game_mode != 2:
+            piece = None
+            if len(self.queue_hold) > 0:
+                piece = self.queue_hold[0]
+            elif len(self.queue_next) > 0:
+                piece = self.queue_next[0]
+                nexts_held = nexts[1:]
+            # Freebie tetriminos are only created when taken out of a queue.
+            if piece is not None and piece.get_tetrimino() is not None:
+                held = (piece.number, piece.get_tetrimino(), piece.get_masks(), piece.rotation)
+        search = None
+        if self.games.ai_lookahead > 0:
+            search = (self.games.ai_lookahead, self.games.ai_beam_width, None if self.games.seed is not None else self.games.ai_budget, self.games.ai_weights)
+        return (list(self.rows_stack), self.games.column_count, current, held, self.flag_ghost, self.flag_heavy, self.random_ai.getrandbits(32), nexts, nexts_held, self.games.ai_weights_greedy, search)
+
+    # Return a dictionary containing the attributes that change during the game, which can be restored with set_state. The values are not copied.
+    def get_state(self):
+        return get_attributes(self, self.names_state_excluded)
+
+    # Restore the attributes of the game from a dictionary created by get_state, then update the display.
+    def set_state(self, state):
+        set_attributes(self, state, self.names_state_excluded)
+        self.array_stack = self.stack.matrix
+        self.update()
+        self.draw_hold()
+        self.draw_next()
+        self.draw_garbage()
+
+    # Return a list of tuples (ID, array, masks, rotation) of the tetriminos in the next queue, up to the first tetrimino that is only created when taken out of the queue.
+    def get_tetriminos_next(self):
+        tetriminos = []
+        for piece in self.queue_next:
+            tetrimino = piece.get_tetrimino()
+            if tetrimino is None:
+                break
+            tetriminos.append((piece.number, tetrimino, piece.get_masks(), piece.rotation))
+        return tetriminos
+
+# A class that simulates many AI games together, storing all matrices in one stacked array so that falling, locking, clearing lines, and adding garbage are applied to every game at once. Used for the 99-player mode. Special effects, hold, and the next queue are not used.
+class TetronBatch:
+    # Initialize the attributes of the instance of this class when it is first created.
+    def __init__(self, count, games):
+        self.count = count
+        self.games = games
+
+        # Initialize attributes.
+        self.initialize()
+
+    # Initialize values of attributes that are both modified during the game and reset when starting the game.
+    def initialize(self):
+        # Initialize flags indicating statuses of the games.
+        self.flag_playing = False
+        self.flag_paused = False
+        self.flags_lose = np.zeros(self.count, dtype=bool)
+
+        # Initialize the stacked arrays of dropped blocks.
+        self.array_stacks = np.zeros([self.count, self.games.row_count, self.games.column_count], dtype=int)
+        # Initialize the IDs, rotations, and positions (row, column) of the current tetriminos, and the rows, columns, and values of their cells relative to their positions.
+        self.ids_current = np.zeros(self.count, dtype=int)
+        self.rotations_current = np.zeros(self.count, dtype=int)
+        self.rows_current = np.zeros(self.count, dtype=int)
+        self.columns_current = np.zeros(self.count, dtype=int)
+        self.cells_current = np.zeros([self.count, 3, cell_count], dtype=int)
+
+        # Initialize the times of the previous block falls, the times when the current tetriminos were created, and the delays before hard dropping them.
+        self.times_fall = np.zeros(self.count)
+        self.times_evaluate = np.zeros(self.count)
+        self.ai_delays = np.zeros(self.count)
+        # Initialize the numbers of garbage lines waiting to be put in each matrix, and the times when they were received.
+        self.garbage = np.zeros(self.count, dtype=int)
+        self.times_receive_garbage = np.zeros(self.count)
+        # Initialize the numbers of placed tetriminos and the numbers of successive line clears.
+        self.counts = np.zeros(self.count, dtype=int)
+        self.combos = np.zeros(self.count, dtype=int)
+
+        # Create separate random number generators for selecting tetriminos, empty columns in garbage, targets, and AI moves and delays, shared by all games in the batch.
+        self.random_pieces = create_random(self.games, 'batch', 'pieces')
+        self.random_garbage = create_random(self.games, 'batch', 'garbage')
+        self.random_target = create_random(self.games, 'batch', 'target')
+        self.random_ai = create_random(self.games, 'batch', 'ai')
+
+    # Start the games.
+    def start_game(self):
+        self.initialize()
+        self.flag_playing = True
+        self.set_tetriminos(np.arange(self.count))
+
+    # Pause or resume the games.
+    def pause_game(self):
+        self.flag_playing = self.flag_paused
+        self.flag_paused = not self.flag_paused
+
+    # Stop the games.
+    def stop_game(self):
+        self.flag_playing = False
+        self.flag_paused = False
+        self.garbage[:] = 0
+
+    # Return the number of games that have not lost.
+    def count_remaining(self):
+        return int(np.count_nonzero(~self.flags_lose))
+
+    # Return the indices of games that have not lost.
+    def get_remaining(self):
+        return np.flatnonzero(~self.flags_lose)
+
+    # Create new tetriminos in the games with the given indices, and decide where the AI will place them. Games lose if the new tetrimino cannot be placed.
+    def set_tetriminos(self, indices):
+        time_current = self.games.time_current
+        # Randomly select a category, then a tetrimino within the category. Tetriminos that change shape are excluded.
+        score = self.games.score
+        weight_advanced = 0 if self.games.flag_classic else np.interp(score, [score_update_chance_advanced, score_thresholds[-2]], weights_advanced)
+        ids_advanced = [number for number in id_advanced if (number, 0) in tetriminos_rotated]
+        rows_stacks = (self.array_stacks[indices] > 0).dot(1 << np.arange(self.games.column_count)).tolist()
+        for index, rows_stack in zip(indices.tolist(), rows_stacks):
+            if self.random_pieces.random() < weight_advanced:
+                number = self.random_pieces.choice(ids_advanced)
+            else:
+                number = self.random_pieces.choice(id_classic)
+            tetrimino, masks = tetriminos_rotated[(number, 0)]
+            row, column = 0, int(np.floor((self.games.column_count-tetrimino.shape[1])/2))
+            if check_collision(rows_stack, self.games.column_count, masks, row, column):
+                self.flags_lose[index] = True
+                continue
+            # Evaluate every placement and select one randomly from those with the maximum effectiveness value.
+            features = BoardFeatures(rows_stack, self.games.column_count)
+            evaluations = [
+                (evaluate_placement(features, masks_placed, row_placed, column_placed, self.games.ai_weights_greedy), rotation_placed, column_placed, row_placed)
+                for rotation_placed, column_placed, row_placed, masks_placed in enumerate_placements(rows_stack, self.games.column_count, number, tetrimino, masks, 0, row, column)
+                ]
+            effectiveness = max([evaluation[0] for evaluation in evaluations])
+            _, rotation, column, row_placed = self.random_ai.choice([evaluation for evaluation in evaluations if evaluation[0] == effectiveness])
+            # Create the tetrimino in its final rotation and column, or directly in its final position if it cannot be created in the top row.
+            if check_collision(rows_stack, self.games.column_count, tetriminos_rotated[(number, rotation)][1], row, column):
+                row = row_placed
+            self.ids_current[index] = number
+            self.rotations_current[index] = rotation
+            self.rows_current[index] = row
+            self.columns_current[index] = column
+            self.cells_current[index] = cells_rotated[(number, rotation)]
+            self.times_fall[index] = time_current
+            self.times_evaluate[index] = time_current
+            self.ai_delays[index] = self.random_ai.gauss(self.games.ai_delay_mean, self.games.ai_delay_std)
+
+    # Return the rows and columns of the cells of the current tetriminos in the games with the given indices.
+    def get_cells(self, indices):
+        rows = self.rows_current[indices, None] + self.cells_current[indices, 0]
+        columns = self.columns_current[indices, None] + self.cells_current[indices, 1]
+        return rows, columns
+
+    # Advance the games to the current time by letting tetriminos fall, hard dropping tetriminos after the AI delay, and locking tetriminos that have landed.
+    def step(self):
+        if not self.flag_playing:
+            return
+        time_current = self.games.time_current
+        remaining = ~self.flags_lose
+        rows, columns = self.get_cells(slice(None))
+        distances = calculate_distances(self.array_stacks > 0, rows, columns)
+        # Hard drop tetriminos whose delay has elapsed.
+        is_harddrop = remaining & (time_current - self.times_evaluate >= self.ai_delays)
+        # Let other tetriminos fall, locking those that cannot fall.
+        speed_fall = np.interp(self.games.score, [0, score_thresholds[-2]], speeds_fall_classic if self.games.flag_classic else speeds_fall)
+        is_fall = remaining & ~is_harddrop & (time_current - self.times_fall >= speed_fall)
+        is_lock = is_harddrop | (is_fall & (distances == 0))
+        self.rows_current[is_fall & ~is_lock] += 1
+        self.rows_current[is_harddrop] += distances[is_harddrop]
+        self.times_fall[is_fall] = time_current
+        if np.any(is_lock):
+            self.lock(np.flatnonzero(is_lock))
+
+    # Lock the current tetriminos in the games with the given indices, clear lines, send and put garbage, and create new tetriminos.
+    def lock(self, indices):
+        row_count = self.games.row_count
+        rows, columns = self.get_cells(indices)
+        self.array_stacks[indices[:, None], rows, columns] = self.cells_current[indices, 2]
+        self.counts[indices] += 1
+
+        # Check for cleared lines and empty them by moving the cleared rows to the top of each matrix.
+        array_stacks = self.array_stacks[indices]
+        is_cleared = np.all(array_stacks > 0, axis=2)
+        line_counts = np.sum(is_cleared, axis=1)
+        if np.any(line_counts):
+            array_stacks = np.take_along_axis(array_stacks, np.argsort(~is_cleared, axis=1, kind='stable')[:, :, None], axis=1)
+            array_stacks[np.arange(row_count)[None, :] < line_counts[:, None]] = 0
+            self.array_stacks[indices] = array_stacks
+        # Increment the combo counters of games that cleared lines.
+        self.combos[indices] = np.where(line_counts > 0, self.combos[indices] + 1, 0)
+        is_perfect = (line_counts > 0) & ~np.any(array_stacks, axis=(1, 2))
+
+        # Calculate the numbers of garbage lines, including bonus lines for perfect clears and combos.
+        garbage_counts = np.array([0, 0, 1, 2, 4])[np.minimum(line_counts, 4)]
+        garbage_counts += 4 * is_perfect
+        garbage_counts += np.searchsorted([2, 4, 6, 8, 11], self.combos[indices], side='right')
+        # Clear garbage lines if the queue contains any, or send garbage lines otherwise.
+        garbage = self.garbage[indices]
+        self.garbage[indices] = np.maximum(garbage - garbage_counts, 0)
+        for index, count in zip(indices[garbage == 0].tolist(), garbage_counts[garbage == 0].tolist()):
+            if count > 0:
+                targets = self.games.get_targets(len(self.games.all) + index)
+                if len(targets) > 0:
+                    self.games.send_garbage(self.random_target.choice(targets), count)
+        # Put garbage in the matrix if the warning time has elapsed.
+        is_put = (garbage_counts == 0) & (self.garbage[indices] > 0) & (self.games.time_current - self.times_receive_garbage[indices] >= time_garbage_warning)
+        if np.any(is_put):
+            self.put_garbage(indices[is_put])
+
+        # Stop games with blocks in the top row, or create new tetriminos.
+        self.flags_lose[indices] |= np.any(self.array_stacks[indices, 0, :], axis=1)
+        indices = indices[~self.flags_lose[indices]]
+        if len(indices) > 0:
+            self.set_tetriminos(indices)
+
+    # Add garbage to the queue of the game with the given index.
+    def add_garbage(self, index, count):
+        if count > 0 and not self.flags_lose[index]:
+            if self.garbage[index] == 0:
+                self.times_receive_garbage[index] = self.games.time_current + 0
+            self.garbage[index] = min(self.garbage[index] + count, 12)
+
+    # Add all garbage lines in the queues of the games with the given indices to their matrices.
+    def put_garbage(self, indices):
+        row_count, column_count = self.games.row_count, self.games.column_count
+        counts = self.garbage[indices]
+        # Shift each matrix up by its number of garbage lines, and fill the rows below with garbage with one empty column.
+        rows = np.arange(row_count)[None, :] + counts[:, None]
+        is_garbage = rows >= row_count
+        array_stacks = np.take_along_axis(self.array_stacks[indices], np.minimum(rows, row_count-1)[:, :, None], axis=1)
+        array_stacks[is_garbage] = 900
+        columns_empty = np.array([self.random_garbage.choice(range(column_count)) for _ in indices])
+        array_stacks[is_garbage[:, :, None] & (np.arange(column_count)[None, None, :] == columns_empty[:, None, None])] = 0
+        self.array_stacks[indices] = array_stacks
+        self.garbage[indices] = 0
+        self.times_receive_garbage[indices] = self.games.time_current + 0
+
+    # Return the stacked arrays of dropped blocks with the current tetriminos inserted.
+    def get_arrays_display(self):
+        arrays = self.array_stacks.copy()
+        if self.flag_playing or self.flag_paused:
+            indices = self.get_remaining()
+            rows, columns = self.get_cells(indices)
+            arrays[indices[:, None], rows, columns] = self.cells_current[indices, 2]
+        return arrays
+
+    # Return a dictionary containing the attributes that change during the games, which can be restored with set_state. The values are not copied.
+    def get_state(self):
+        return get_attributes(self, ['games'])
+
+    # Restore the attributes of the games from a dictionary created by get_state.
+    def set_state(self, state):
+        set_attributes(self, state, ['games'])
+
+
+# A class that stores and manages different game instances.
+class Games:
+    # The class used to create new game instances when switching game modes. Frontends replace this with their own subclass of Tetron.
+    game_class = Tetron
+    # The names of attributes saved in the state of the games, in addition to the state of each game.
+    names_state = ['time_current', 'time_target', 'time_start', 'time_elapsed', 'score', 'score_previous', 'remaining', 'remaining_previous', 'stage', 'count_start']
+
+    def __init__(self, row_count=20, column_count=10, seed=None):
+        self.player = []
+        self.ai = []
+        self.all = []
+        # Initialize the batch of AI games used in the 99-player mode.
+        self.batch = None
+        # Initialize the number of worker processes used to decide AI moves, and the pool of worker processes, which is created when games start.
+        self.ai_processes = ai_processes
+        self.executor = None
+        # Initialize whether to search for AI moves on a background thread, and the thread, which is created when games start.
+        self.ai_thread = ai_thread
+        self.searcher = None
+        # Initialize the parameters of the delay between deciding and performing AI moves, and the weights used to score placements when not searching ahead.
+        self.ai_delay_mean = ai_delay_mean
+        self.ai_delay_std = ai_delay_std
+        self.ai_weights_greedy = dict(ai_weights_greedy)
+        # Initialize the settings used by AI games to search ahead.
+        self.ai_lookahead = ai_lookahead
+        self.ai_beam_width = ai_beam_width
+        self.ai_budget = ai_budget
+        self.ai_weights = dict(ai_weights)
+        # Initialize the strategy used to select tetriminos.
+        self.randomizer = randomizer
+        # Initialize the session connecting the player game to the games of other players over a network, or None to play locally.
+        self.network = None
+        # Initialize the object that returns the repeats of the actions of held keys that are due at each tick, such as an InputScheduler, or None to not repeat actions.
+        self.scheduler = None
+        # Initialize the object that records the actions applied to the games to a replay file, or None to not record.
+        self.recorder = None
+
+        # Initialize time-related attributes. The current time is the time of the last simulated tick, and the target time is the time the games are advanced to.
+        self.time_current = 0
+        self.time_target = 0
+        self.time_start = 0
+        self.time_elapsed = 0
+
+        # Initialize the game mode number and classic flag.
+        self.game_mode = 1
+        self.flag_classic = False
+
+        # Define the numbers of rows and columns.
+        self.row_count = row_count
+        self.column_count = column_count
+
+        # Define the seed used to create the random number generators of each game, or None to use random seeds, and initialize the number of times the games were started.
+        self.seed = seed
+        self.count_start = 0
+
+        # Initialize game-related attributes.
+        self.reset_game()
+
+    # Reset parameters when starting a new game.
+    def reset_game(self):
+        self.score = 0
+        self.score_previous = 0
+        self.remaining = 0
+        self.remaining_previous = 0
+        self.stage = 0
+
+    # Set the time (ms) that the games are advanced to on the next step.
+    def set_time(self, time_current):
+        self.time_target = time_current
+
+    # Return a Boolean indicating whether any game is playing.
+    def is_playing(self):
+        return any([game.flag_playing for game in self.all]) or (self.batch is not None and self.batch.flag_playing)
+
+    # Start each game.
+    def start_games(self):
+        self.reset_game()
+        self.count_start += 1
+        self.time_start = self.time_current + 0
+        self.time_elapsed = 0
+        # Create the worker processes used to decide AI moves.
+        if self.ai_processes > 0 and self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(self.ai_processes)
+        # Create the background thread used to search for AI moves, or close it if the games now have a seed.
+        if self.ai_thread and self.seed is None and self.executor is None:
+            if self.searcher is None:
+                self.searcher = SearchThread()
+        elif self.searcher is not None:
+            self.searcher.close()
+            self.searcher = None
+        # Start the batch first so that games can target it.
+        if self.batch is not None:
+            self.batch.start_game()
+        for game in self.all:
+            game.start_game()
+        if self.recorder is not None:
+            self.recorder.start(self)
+
+    # Pause or resume each game.
+    def pause_games(self):
+        self.record('pause')
+        for game in self.all:
+            game.pause_game()
+        if self.batch is not None:
+            self.batch.pause_game()
+
+    # Stop each game.
+    def stop_games(self):
+        self.record('stop')
+        for game in self.all:
+            game.stop_game()
+        if self.batch is not None:
+            self.batch.stop_game()
+
+    # Shut down the worker processes and the background thread used to decide AI moves without waiting for pending decisions, and finish recording.
+    def close(self):
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.searcher is not None:
+            self.searcher.close()
+            self.searcher = None
+
+    # Add the score increments of each game to the total score, count the remaining players, and update the difficulty of each game.
+    def update_score(self):
+        # Record the update if it changes the score or the number of remaining players, so that replays update them at the same times without recording every call.
+        pending = any([len(game.score_increment) > 0 for game in self.all])
+        state_previous = (self.score, self.score_previous, self.remaining, self.remaining_previous)
+        # Calculate score.
+        self.score_previous = self.score + 0
+        if self.game_mode in [1]:
+            self.score += sum([game.score_increment.pop(0) for game in self.player if len(game.score_increment) > 0])
+        elif self.game_mode in [2]:
+            scores = [game.score_increment.pop(0) for game in self.player if len(game.score_increment) > 0]
+            # Apply a point multiplier if both games earned points.
+            if len([score for score in scores if score > 0]) > 1:
+                scores = sum(scores) * 3
+            else:
+                scores = sum(scores)
+            self.score += scores
+        elif self.game_mode in [3]:
+            self.score += max([0] + [game.score_increment.pop(0) for game in self.all if len(game.score_increment) > 0])
+        # Calculate number of players left.
+        self.remaining_previous = self.remaining + 0
+        self.remaining = sum([not game.flag_lose for game in self.all])
+        if self.batch is not None:
+            self.remaining += self.batch.count_remaining()
+        # Update scores and difficulty for all games.
+        for game in self.all:
+            game.score = self.score + 0
+            game.update_difficulty()
+        if pending or state_previous != (self.score, self.score_previous, self.remaining, self.remaining_previous):
+            self.record('score')
+
+    # Win, lose, or advance to the next stage. Return 'win', 'lose', 'stage', or None to indicate what happened.
+    def update_progress(self):
+        # Win the game.
+        if self.game_mode in [1, 2] and self.score_previous < score_thresholds[-1] <= self.score or \
+            self.game_mode in [3, 4] and self.remaining <= remaining_thresholds[-1] < self.remaining_previous:
+            self.record('progress')
+            # Stop all games.
+            self.stop_games()
+            return 'win'
+        # Stop the game if the player has lost.
+        elif any([game.flag_lose for game in self.player]):
+            self.record('progress')
+            # Stop player games.
+            for game in self.player:
+                game.flag_lose = False
+                game.stop_game()
+            return 'lose'
+        # Advance to the next stage of the game.
+        elif self.game_mode in [1, 2, 3] and self.score_previous < score_thresholds[self.stage] <= self.score and self.stage < 2 or \
+            self.game_mode in [4] and self.remaining <= remaining_thresholds[self.stage] < self.remaining_previous:
+            # Calculate the stage value.
+            if self.game_mode in [1, 2, 3]:
+                self.stage = sum([self.score >= i for i in score_thresholds])
+            elif self.game_mode in [4]:
+                self.stage = sum([self.remaining <= i for i in remaining_thresholds])
+            self.record('progress')
+            return 'stage'
+        return None
+
+    # Advance every game to the target time in ticks of fixed duration.
+    def step(self):
+        if self.recorder is not None:
+            self.recorder.update(self)
+        count = int((self.time_target - self.time_current) // duration_tick)
+        # Skip ahead without simulating if no game is playing, or if too far behind, such as after the window was dragged.
+        if not self.is_playing():
+            if count > 0:
+                self.record('idle', count)
+            self.time_current += count * duration_tick
+            return
+        if count > tick_count_max:
+            self.record('skip', count - tick_count_max)
+            self.time_current += (count - tick_count_max) * duration_tick
+            self.time_elapsed += (count - tick_count_max) * duration_tick
+            count = tick_count_max
+        for _ in range(count):
+            self.repeat_actions()
+            self.time_current += duration_tick
+            self.time_elapsed += duration_tick
+            self.step_tick()
+
+    # Perform the repeats of the actions of held keys that are due at the current tick, through the network session if playing over a network so that other players receive them.
+    def repeat_actions(self):
+        if self.scheduler is None:
+            return
+        for action, indices, count in self.scheduler.update(self.time_current):
+            if self.network is not None:
+                self.network.perform_player(action, count, is_repeat=True)
+            else:
+                self.perform_action(action, indices, count, is_repeat=True)
+
+    # Advance each game by one tick.
+    def step_tick(self):
+        # Hard drop all player games if one game has hard dropped.
+        if any([game.flag_harddrop for game in self.player]):
+            for game in self.player:
+                if not game.flag_harddrop:
+                    game.harddrop()
+                game.flag_harddrop = False
+        for game in self.all:
+            game.step()
+        if self.batch is not None:
+            self.batch.step()
+
+    # Perform an action in actions_player on the player games with the given indices. Input a count to repeat the action, or -1 to repeat it until it fails, and True for 'is_repeat' if the action is a repeat of a held key.
+    def perform_action(self, action, indices, count=1, is_repeat=False):
+        self.record('action', actions_player.index(action), sum([1 << index for index in indices]), count, int(is_repeat))
+        games_player = [self.player[index] for index in indices if index < len(self.player)]
+        # Move left or right.
+        if action in ['move_left', 'move_right']:
+            direction = -1 if action == 'move_left' else 1
+            for game in games_player:
+                for _ in range(count if count >= 0 else self.column_count):
+                    if not game.move(direction):
+                        break
+        # Rotate counterclockwise or clockwise.
+        elif action in ['rotate_clockwise', 'rotate_counterclockwise']:
+            for game in games_player:
+                game.rotate(-1 if action == 'rotate_clockwise' else 1)
+        # Hard drop.
+        elif action == 'harddrop':
+            for game in games_player:
+                game.harddrop()
+        # Start soft dropping, or shift down while soft dropping.
+        elif action == 'softdrop':
+            for game in games_player:
+                if not is_repeat:
+                    game.softdrop_start()
+                else:
+                    for _ in range(count if count >= 0 else self.row_count):
+                        # Check whether soft dropping to prevent advancing line immediately after landing.
+                        if not game.flag_softdropping or not game.fall():
+                            break
+                        # Play sound effect.
+                        game.play_sound('game_softdrop')
+        # Stop soft dropping.
+        elif action == 'softdrop_stop':
+            for game in games_player:
+                # Only stop if currently soft dropping.
+                if game.flag_softdropping:
+                    game.softdrop_stop()
+        # Hold or swap.
+        elif action == 'hold':
+            # Check that no games currently holding, no games have a ghost block, and no games have a heavy block.
+            if not any([any([game.flag_hold, game.flag_ghost, game.flag_heavy, game.flag_zombie]) for game in self.player]):
+                # Hold.
+                for game in games_player:
+                    game.hold()
+                # Swap.
+                if len(self.player) >= 2:
+                    for index in indices:
+                        index_swap = np.roll(range(0,len(self.player)), 1)[index]
+                        self.player[index].swap(self.player[index_swap])
+
+    # Record an event of the given kind with the given values if recording.
+    def record(self, kind, *values):
+        if self.recorder is not None:
+            self.recorder.record(self, kind, values)
+
+    # Return a dictionary containing the state of the games, including the state of each game, which can be restored with set_state. The values are not copied.
+    def get_state(self):
+        return {
+            'games': {name: getattr(self, name) for name in self.names_state},
+            'all': [game.get_state() for game in self.all],
+            'batch': self.batch.get_state() if self.batch is not None else None,
+            }
+
+    # Restore the state of the games and of each game from a dictionary created by get_state. The games must have been created in the same game mode with the same number of games.
+    def set_state(self, state):
+        for name, value in state['games'].items():
+            setattr(self, name, value)
+        for game, state_game in zip(self.all, state['all']):
+            game.set_state(state_game)
+        if self.batch is not None:
+            self.batch.set_state(state['batch'])
+
+    # Return the instance numbers of games that have not lost, excluding the given instance number, that can be sent garbage. Games in the batch are numbered after all other games. Garbage is only sent when playing with AI, or to the other players when playing over a network.
+    def get_targets(self, instance):
+        if self.network is not None:
+            return self.network.get_targets()
+        if len(self.ai) == 0 and self.batch is None:
+            return []
+        targets = [game.instance_self for game in self.all if not game.flag_lose and game.instance_self != instance]
+        if self.batch is not None:
+            targets += [len(self.all) + index for index in self.batch.get_remaining().tolist() if len(self.all) + index != instance]
+        return targets
+
+    # Send garbage to the game with the given instance number.
+    def send_garbage(self, instance, count):
+        if self.network is not None:
+            self.network.send_garbage(instance, count)
+        elif instance < len(self.all):
+            self.all[instance].add_garbage(count)
+        elif self.batch is not None:
+            self.batch.add_garbage(instance - len(self.all), count)
+
+    # Switch game modes.
+    def set_mode(self, mode):
+        if mode != self.game_mode:
+            self.game_mode = mode
+            self.batch = None
+            if mode == 1:
+                self.remove_games_player()
+                self.remove_games_ai()
+            elif mode == 2:
+                self.remove_games_player()
+                self.remove_games_ai()
+                self.add_game(self.game_class(True, len(self.player), self))
+            elif mode == 3:
+                self.remove_games_player()
+                self.add_game(self.game_class(False, len(self.all), self))
+            elif mode == 4:
+                self.remove_games_player()
+                self.remove_games_ai()
+                self.batch = TetronBatch(batch_count, self)
+
+    # Invert the classic flag.
+    def toggle_classic(self):
+        self.flag_classic = not self.flag_classic
+
+    # Add a game to the corresponding list.
+    def add_game(self, game):
+        if game.is_player:
+            self.player.append(game)
+        else:
+            self.ai.append(game)
+        self.all.append(game)
+
+    # Delete all player games except the first game.
+    def remove_games_player(self):
+        self.player = [self.player[0]]
+        self.all = [game for game in self.all if game.is_player and game.instance_self == 0]
+
+    # Delete all AI games.
+    def remove_games_ai(self):
+        self.ai = []
+        self.all = [game for game in self.all if game.is_player]
@@ -0,0 +1,125 @@
+# Board features for the Tetron AI. Keeps the heights, holes, row transitions, wells, and bumpiness of a stack of dropped blocks stored as a bitboard, containing one integer per row with bit j set if column j is occupied, and calculates how they change when a tetrimino is placed without copying the bitboard. Does not depend on pygame.
+
+
+# =============================================================================
+# Functions.
+# =============================================================================
+# Return a list containing the index of the highest row with a block in each column of the given bitboard, or the number of rows for empty columns.
+def calculate_tops(rows_stack, column_count):
+    tops = [len(rows_stack)] * column_count
+    covered = 0
+    for index, row in enumerate(rows_stack):
+        uncovered = row & ~covered
+        while uncovered:
+            bit = uncovered & -uncovered
+            tops[bit.bit_length()-1] = index
+            uncovered ^= bit
+        covered |= row
+    return tops
+
+# Return the number of changes between empty and occupied blocks along a row with the given mask, counting the walls as occupied.
+def count_transitions(mask, column_count):
+    bits = (mask << 1) | 1 | (1 << (column_count+1))
+    return bin((bits ^ (bits >> 1)) & ((1 << (column_count+1)) - 1)).count('1')
+
+# Return the depth of the well in a column with the given height between columns with the given heights, counting the walls as infinitely high.
+def calculate_well(height, height_left, height_right):
+    return max(0, min(height_left, height_right) - height)
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that calculates the features of a bitboard once, and the features after placing a tetrimino in it by updating only the rows and columns that the tetrimino occupies.
+class BoardFeatures:
+    # Initialize the attributes of the instance of this class by inputting a bitboard and the number of columns.
+    def __init__(self, rows_stack, column_count):
+        self.rows_stack = rows_stack
+        self.column_count = column_count
+        self.row_count = len(rows_stack)
+        self.row_full = (1 << column_count) - 1
+        # Calculate the height of each column, measured from the bottom of the matrix, the number of full lines, and the number of holes, which are empty blocks below the highest block in their column.
+        self.heights = [self.row_count - top for top in calculate_tops(rows_stack, column_count)]
+        self.height = max(self.heights)
+        self.lines = rows_stack.count(self.row_full)
+        self.holes = 0
+        covered = 0
+        for row in rows_stack:
+            self.holes += bin(covered & ~row).count('1')
+            covered |= row
+        # Initialize the features describing the shape of the surface, which are calculated when first needed.
+        self.transitions = None
+        self.wells = None
+        self.bumpiness = None
+
+    # Calculate the row transitions of each row, the depth of the well in each column, and the difference in height between each pair of adjacent columns, and their totals.
+    def calculate_shape(self):
+        self.transitions_row = [count_transitions(row, self.column_count) for row in self.rows_stack]
+        heights = [self.row_count] + self.heights + [self.row_count]
+        self.wells_column = [calculate_well(heights[column], heights[column-1], heights[column+1]) for column in range(1, self.column_count+1)]
+        self.bumps = [abs(self.heights[column] - self.heights[column+1]) for column in range(self.column_count-1)]
+        self.transitions = sum(self.transitions_row)
+        self.wells = sum(self.wells_column)
+        self.bumpiness = sum(self.bumps)
+
+    # Return a dictionary containing the number of full lines, the number of holes, and the maximum height after inserting a tetrimino with the given row masks at the given row and column, without clearing lines. Input True for 'flag_shape' to also include the row transitions, the total depth of wells, and the bumpiness. Tetriminos that extend past the left or right wall wrap around to the other side.
+    def place(self, masks, row, column, flag_shape=False):
+        if flag_shape and self.transitions is None:
+            self.calculate_shape()
+        lines = self.lines
+        transitions = self.transitions
+        heights = self.heights
+        # Count the added blocks and the increase in the height of each column, which together give the change in holes.
+        count_added = 0
+        increase = 0
+        covered = 0
+        columns_changed = []
+        # Update the rows containing the tetrimino, from top to bottom.
+        for index, mask in masks:
+            if column >= 0:
+                mask <<= column
+            else:
+                mask >>= -column
+            mask = (mask | (mask >> self.column_count)) & self.row_full
+            row_old = self.rows_stack[row+index]
+            row_new = row_old | mask
+            lines += (row_new == self.row_full) - (row_old == self.row_full)
+            if flag_shape:
+                transitions += count_transitions(row_new, self.column_count) - self.transitions_row[row+index]
+            added = row_new ^ row_old
+            count_added += bin(added).count('1')
+            # Raise the height of each column whose highest added block is in this row.
+            uncovered = added & ~covered
+            covered |= added
+            while uncovered:
+                bit = uncovered & -uncovered
+                uncovered ^= bit
+                column_added = bit.bit_length() - 1
+                height = self.row_count - (row+index)
+                if height > heights[column_added]:
+                    if heights is self.heights:
+                        heights = list(self.heights)
+                    increase += height - heights[column_added]
+                    heights[column_added] = height
+                    columns_changed.append(column_added)
+
+        placed = {
+            'lines': lines,
+            'holes': self.holes + increase - count_added,
+            'height': max(self.height, self.row_count - (row + masks[0][0])),
+            }
+        if flag_shape:
+            # Update the wells and bumpiness next to the columns whose heights changed.
+            wells = self.wells
+            bumpiness = self.bumpiness
+            if len(columns_changed) > 0:
+                for index in range(max(0, min(columns_changed)-1), min(self.column_count, max(columns_changed)+2)):
+                    height_left = heights[index-1] if index > 0 else self.row_count
+                    height_right = heights[index+1] if index < self.column_count-1 else self.row_count
+                    wells += calculate_well(heights[index], height_left, height_right) - self.wells_column[index]
+                    if index < self.column_count-1:
+                        bumpiness += abs(heights[index] - height_right) - self.bumps[index]
+            placed['transitions'] = transitions
+            placed['wells'] = wells
+            placed['bumpiness'] = bumpiness
+        return placed
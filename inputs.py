@@ -0,0 +1,51 @@
+# Key repeats for Tetron. Held keys are repeated at fixed times measured from when they were pressed, instead of at most once per frame, and the games apply each repeat at the tick it becomes due, so that auto-repeat does not depend on the frame rate. Does not depend on pygame.
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that records held keys and returns the number of repeats of their actions that are due.
+class InputScheduler:
+    # Initialize the attributes of the instance of this class by inputting a dictionary with actions as keys and tuples (delay, speed) as values, containing the initial delay (ms) before repeating and the time (ms) between repeats. A speed of 0 repeats the action as many times as possible.
+    def __init__(self, repeats):
+        self.repeats = repeats
+        # Initialize the dictionary with held keys as keys and lists [action, indices, time pressed, number of repeats] as values.
+        self.held = {}
+
+    # Record that a key bound to the given action on the player games with the given indices was pressed at the given time (ms). Keys bound to actions that do not repeat are ignored.
+    def press(self, key, action, indices, time_pressed):
+        if action in self.repeats:
+            self.held[key] = [action, indices, time_pressed, 0]
+
+    # Record that a key was released.
+    def release(self, key):
+        self.held.pop(key, None)
+
+    # Release all keys.
+    def clear(self):
+        self.held = {}
+
+    # Release the keys that are not pressed, to release keys whose release was missed, by inputting the keys currently pressed, indexable by key.
+    def release_unpressed(self, keys_pressed):
+        for key in list(self.held):
+            if not keys_pressed[key]:
+                self.release(key)
+
+    # Return a list of tuples (action, indices, count) containing the number of repeats of each held action that became due at or before the given time (ms) since the previous update, or a count of -1 to repeat as many times as possible.
+    def update(self, time_current):
+        repeats = []
+        for held in self.held.values():
+            action, indices, time_pressed, count_repeated = held
+            delay, speed = self.repeats[action]
+            duration = time_current - time_pressed
+            if duration < delay:
+                continue
+            if speed <= 0:
+                repeats.append((action, indices, -1))
+            else:
+                # Count every repeat due at the times delay, delay + speed, delay + 2*speed, ... after the key was pressed.
+                count = int((duration - delay) // speed) + 1 - count_repeated
+                if count > 0:
+                    held[3] += count
+                    repeats.append((action, indices, count))
+        return repeats
@@ -0,0 +1,589 @@
+#!/usr/bin/python
+
+# Local-network multiplayer for Tetron. Each player's game runs in its own process, and players exchange only the actions applied to their games and the garbage they send, through a server that relays messages over TCP using asyncio. Every process also simulates a copy of the game of each other player by applying the same actions at the same ticks to a game started with the same seed, so that matrices are never sent. Games are kept in lockstep by not letting any game get too many ticks ahead of the others. Does not depend on pygame.
+
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import struct
+import sys
+import time
+
+import engine
+
+
+# =============================================================================
+# Network Settings.
+# =============================================================================
+# Define the default host and port of the server.
+host_default = '127.0.0.1'
+port_default = 24680
+# Define the maximum number of ticks a game can be ahead of the game of any other player that is still playing.
+ticks_ahead_max = 40
+# Define the maximum time (ms) between messages containing actions, which are sent even if no actions were applied so that other players can advance their copies of the game.
+duration_heartbeat = 50
+# Define the time (ms) between frames of headless clients.
+duration_frame = 10
+# Define the time (ms) that headless clients wait after deciding a move before hard dropping.
+delay_bot = 150
+
+
+# =============================================================================
+# Protocol.
+# =============================================================================
+# Define the types of messages, each sent as one byte followed by the values in the corresponding format: the start of a match (player index, number of players, classic flag, seed), actions (player index, number of ticks the player's game was advanced to, number of events), garbage (sending player index, target player index, number of lines), and a player leaving (player index).
+message_start = 1
+message_actions = 2
+message_garbage = 3
+message_leave = 4
+formats_message = {
+    message_start: struct.Struct('!BBBI'),
+    message_actions: struct.Struct('!BIB'),
+    message_garbage: struct.Struct('!BBB'),
+    message_leave: struct.Struct('!B'),
+    }
+# Define the format of each event following an actions message: the number of ticks since the previous event, or since the tick of the previous actions message for the first event, and the code of the action.
+format_event = struct.Struct('!HB')
+# Define the actions that can be applied to a game, whose codes are their indices. Received garbage is coded as the number of lines added to code_garbage.
+actions = ['move_left', 'move_right', 'rotate_clockwise', 'rotate_counterclockwise', 'harddrop', 'softdrop_start', 'softdrop_stop', 'softdrop', 'hold', 'score', 'stop']
+code_garbage = 32
+
+
+# =============================================================================
+# Functions.
+# =============================================================================
+# Return the bytes of a message of the given type containing the given values.
+def pack_message(kind, *values):
+    return bytes([kind]) + formats_message[kind].pack(*values)
+
+# Return the bytes of a message containing the given player's events, a list of tuples (tick, code), after the player's game was advanced to the given tick. Input the tick of the player's previous actions message, which ticks are counted from.
+def pack_actions(player, tick, events, tick_previous):
+    data = bytearray(pack_message(message_actions, player, tick, len(events)))
+    for tick_event, code in events:
+        data += format_event.pack(tick_event - tick_previous, code)
+        tick_previous = tick_event
+    return bytes(data)
+
+# Apply the action with the given code to a game. Both the original game and its copies apply actions with this function, so that they stay identical.
+def apply_action(game, code):
+    if code >= code_garbage:
+        game.add_garbage(code - code_garbage)
+        return
+    action = actions[code]
+    if action == 'softdrop_start':
+        game.games.perform_action('softdrop', [0])
+    elif action == 'softdrop':
+        game.games.perform_action('softdrop', [0], is_repeat=True)
+    elif action == 'score':
+        game.games.update_score()
+    elif action == 'stop':
+        game.stop_game()
+    else:
+        game.games.perform_action(action, [0])
+
+# Start the given games as the games of the given player in a match with the given seed. The games of each player use a different seed derived from the seed of the match, and copies of a player's games are started with the same seed.
+def start_games(games, seed, player, flag_classic):
+    games.seed = '{}-{}'.format(seed, player)
+    games.count_start = 0
+    games.game_mode = 1
+    games.flag_classic = flag_classic
+    games.start_games()
+
+# Return the number of ticks simulated since the given games started.
+def get_tick(games):
+    return (games.time_current - games.time_start) // engine.duration_tick
+
+# Simulate the given games until the given number of ticks have been simulated since they started, without skipping ticks.
+def advance(games, tick):
+    time_target = games.time_start + tick * engine.duration_tick
+    while games.time_current < time_target:
+        games.set_time(min(time_target, games.time_current + engine.tick_count_max * engine.duration_tick))
+        games.step()
+
+# Return a hash of the player game in the given games, used to check that copies of a game match the original.
+def hash_game(games):
+    game = games.player[0]
+    state = (game.rows_stack, int(game.score), game.count, game.queue_garbage, [piece.number for piece in game.queue_next])
+    return hashlib.md5(repr(state).encode()).hexdigest()
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that parses messages from a stream of bytes, which may end partway through a message.
+class MessageReader:
+    # Initialize the attributes of the instance of this class.
+    def __init__(self):
+        self.buffer = bytearray()
+
+    # Add the given bytes to the buffer and return a list of tuples (type, values, events, bytes) of the messages completed, with events containing tuples (ticks since the previous event, code) for actions messages. Raises ValueError if a message has an unknown type.
+    def feed(self, data):
+        self.buffer += data
+        messages = []
+        while len(self.buffer) > 0:
+            kind = self.buffer[0]
+            if kind not in formats_message:
+                raise ValueError('Unknown message type {}'.format(kind))
+            size = 1 + formats_message[kind].size
+            if len(self.buffer) < size:
+                break
+            values = formats_message[kind].unpack_from(self.buffer, 1)
+            events = []
+            if kind == message_actions:
+                size += values[2] * format_event.size
+                if len(self.buffer) < size:
+                    break
+                events = [format_event.unpack_from(self.buffer, 1 + formats_message[kind].size + index*format_event.size) for index in range(values[2])]
+            messages.append((kind, values, events, bytes(self.buffer[:size])))
+            del self.buffer[:size]
+        return messages
+
+
+# A class that connects the player game of this process to the games of the other players in a match. Records the actions applied to the player game to send to other players, applies the actions received from other players to copies of their games, and sends and receives garbage.
+class NetworkSession:
+    # Initialize the attributes of the instance of this class by inputting the games containing the player game, the index of this player, the number of players, the seed of the match, and whether to play classic Tetris.
+    def __init__(self, games, player, player_count, seed, flag_classic=False):
+        self.games = games
+        self.player = player
+        self.player_count = player_count
+        self.seed = seed
+        self.flag_classic = flag_classic
+        self.games.network = self
+        # Create a copy of the games of each other player, and initialize the number of ticks each player's game has been advanced to.
+        self.games_remote = {}
+        for index in range(player_count):
+            if index != player:
+                games_remote = engine.Games(games.row_count, games.column_count)
+                games_remote.add_game(engine.Tetron(True, 0, games_remote))
+                self.games_remote[index] = games_remote
+        self.ticks_remote = {index: 0 for index in self.games_remote}
+        # Initialize the set of players whose games stopped or who left the match.
+        self.finished = set()
+        self.flag_stopped = False
+
+        # Initialize the events of the player game not yet sent, the tick of the previous actions message, the bytes waiting to be sent, and the garbage received but not yet added.
+        self.events = []
+        self.tick_sent = 0
+        self.outgoing = bytearray()
+        self.garbage = []
+        self.reader = MessageReader()
+        # Initialize the number of bytes sent and received, and the number of garbage lines sent and received.
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.garbage_sent = 0
+        self.garbage_received = 0
+
+    # Start the player game and the copies of the games of other players.
+    def start(self):
+        start_games(self.games, self.seed, self.player, self.flag_classic)
+        for index, games_remote in self.games_remote.items():
+            start_games(games_remote, self.seed, index, self.flag_classic)
+
+    # Apply the given action to the player game and record it to send to other players.
+    def perform(self, action):
+        self.record(actions.index(action))
+
+    # Apply the action with the given code to the player game and record it to send to other players.
+    def record(self, code):
+        if self.flag_stopped:
+            return
+        self.events.append((get_tick(self.games), code))
+        apply_action(self.games.player[0], code)
+        if code == actions.index('stop'):
+            self.flag_stopped = True
+
+    # Apply an action bound to a key to the player game, and record it to send to other players. Input a count to repeat the action, or -1 to repeat it as many times as possible, and True for 'is_repeat' if the action is a repeat of a held key.
+    def perform_player(self, action, count=1, is_repeat=False):
+        if action == 'softdrop' and not is_repeat:
+            self.perform('softdrop_start')
+            return
+        if count < 0:
+            count = self.games.row_count if action == 'softdrop' else self.games.column_count
+        for _ in range(count):
+            self.perform(action)
+
+    # Add the score increments of the player game to the score if any are waiting, recording it so that copies add them on the same tick.
+    def update_score(self):
+        if any([len(game.score_increment) > 0 for game in self.games.player]):
+            self.perform('score')
+
+    # Add the garbage received from other players to the player game.
+    def add_garbage(self):
+        for count in self.garbage:
+            if self.games.player[0].flag_playing:
+                self.record(code_garbage + count)
+                self.garbage_received += count
+        self.garbage = []
+
+    # Record that the player with the given index stopped playing or left the match, and select a new target for the player game if it was sending garbage to that player.
+    def finish_player(self, player):
+        self.finished.add(player)
+        game = self.games.player[0]
+        if game.flag_playing and game.instance_target in [player, None]:
+            game.select_target()
+
+    # Return the indices of the other players who are still playing.
+    def get_targets(self):
+        return [index for index in self.games_remote if index not in self.finished]
+
+    # Send the given number of garbage lines to the player with the given index.
+    def send_garbage(self, target, count):
+        self.outgoing += pack_message(message_garbage, self.player, target, count)
+        self.garbage_sent += count
+
+    # Return the number of ticks the player game can be advanced to without getting too far ahead of any other player who is still playing.
+    def get_tick_limit(self):
+        ticks = [tick for index, tick in self.ticks_remote.items() if index not in self.finished]
+        if len(ticks) == 0:
+            return None
+        return min(ticks) + ticks_ahead_max
+
+    # Advance the player game towards the given time (ms), then add a message containing its new events to the bytes waiting to be sent if any events were recorded or if the previous message was sent long enough ago.
+    def step(self, time_current):
+        tick = (time_current - self.games.time_start) // engine.duration_tick
+        tick_limit = self.get_tick_limit()
+        if tick_limit is not None:
+            tick = min(tick, tick_limit)
+        advance(self.games, max(tick, get_tick(self.games)))
+        tick = get_tick(self.games)
+        if len(self.events) > 0 or (not self.flag_stopped and (tick - self.tick_sent) * engine.duration_tick >= duration_heartbeat):
+            # Split the events into messages of at most 255 events, each confirming the ticks up to its last event.
+            while len(self.events) > 255:
+                events, self.events = self.events[:255], self.events[255:]
+                self.outgoing += pack_actions(self.player, events[-1][0], events, self.tick_sent)
+                self.tick_sent = events[-1][0]
+            self.outgoing += pack_actions(self.player, tick, self.events, self.tick_sent)
+            self.tick_sent = tick
+            self.events = []
+
+    # Return the bytes waiting to be sent, and clear them.
+    def flush(self):
+        data = bytes(self.outgoing)
+        self.outgoing = bytearray()
+        self.bytes_sent += len(data)
+        return data
+
+    # Handle the given bytes received from the server.
+    def receive(self, data):
+        self.bytes_received += len(data)
+        for kind, values, events, _ in self.reader.feed(data):
+            if kind == message_actions:
+                player, tick_end, _ = values
+                if player not in self.games_remote:
+                    continue
+                # Apply each action to the copy of the player's game at the tick it was applied to the original.
+                games_remote = self.games_remote[player]
+                tick = self.ticks_remote[player]
+                for ticks, code in events:
+                    tick += ticks
+                    advance(games_remote, tick)
+                    apply_action(games_remote.player[0], code)
+                    if code == actions.index('stop'):
+                        self.finish_player(player)
+                advance(games_remote, tick_end)
+                self.ticks_remote[player] = tick_end
+            elif kind == message_garbage:
+                _, target, count = values
+                if target == self.player:
+                    self.garbage.append(count)
+            elif kind == message_leave:
+                self.finish_player(values[0])
+
+    # Return True if the player game has stopped and every other player has finished.
+    def is_finished(self):
+        return self.flag_stopped and len(self.finished) >= len(self.games_remote)
+
+
+# A class that plays the player game of a session like a player would, deciding each move with the AI and applying one action per frame through the session.
+class NetworkBot:
+    # Initialize the attributes of the instance of this class by inputting the session and the time (ms) to wait after deciding a move before hard dropping.
+    def __init__(self, session, delay=delay_bot):
+        self.session = session
+        self.game = session.games.player[0]
+        self.delay = delay
+        # Initialize the decided move, the number of placed tetriminos when it was decided, and the time it was decided.
+        self.decision = None
+        self.count = None
+        self.time_decide = 0
+
+    # Decide a move for a new tetrimino, or apply the next action towards the decided move.
+    def act(self):
+        game = self.game
+        if not game.flag_playing:
+            return
+        # Decide again if the tetrimino was locked without hard dropping.
+        if self.decision is None or game.count != self.count:
+            self.decision = engine.decide_move(game.ai_snapshot())
+            self.count = game.count
+            self.time_decide = game.games.time_current
+        is_hold, rotation, column = self.decision
+        if is_hold:
+            self.decision = (False, rotation, column)
+            self.session.perform('hold')
+        elif rotation != game.rotation_current:
+            self.session.perform('rotate_counterclockwise')
+        elif column < game.column_current:
+            self.session.perform('move_left')
+        elif column > game.column_current:
+            self.session.perform('move_right')
+        elif game.games.time_current - self.time_decide >= self.delay:
+            self.session.perform('harddrop')
+            self.decision = None
+
+
+# A class that runs a match between a number of players, sending the start of the match once every player has connected and then relaying messages: actions to every other player and garbage only to its target.
+class RelayServer:
+    # Initialize the attributes of the instance of this class by inputting the number of players, the seed of the match, or None to use a random seed, and whether to play classic Tetris.
+    def __init__(self, player_count, seed=None, flag_classic=False):
+        self.player_count = player_count
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.flag_classic = flag_classic
+        # Initialize the dictionary with player indices as keys and stream writers as values, and the number of players who have connected.
+        self.writers = {}
+        self.count_joined = 0
+        self.server = None
+        self.event_done = None
+
+    # Start listening on the given host and port, or on any free port for port 0, and return the port.
+    async def start(self, host=host_default, port=port_default):
+        self.event_done = asyncio.Event()
+        self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    # Wait until every player has left the match, then stop listening.
+    async def wait(self):
+        await self.event_done.wait()
+        self.close()
+
+    # Stop listening.
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+    # Send the given bytes to each player with one of the given indices.
+    def send(self, data, players):
+        for player in players:
+            writer = self.writers.get(player)
+            if writer is not None:
+                writer.write(data)
+
+    # Relay the messages of one player until it disconnects.
+    async def handle(self, reader, writer):
+        if self.count_joined >= self.player_count:
+            writer.close()
+            return
+        player = self.count_joined
+        self.count_joined += 1
+        self.writers[player] = writer
+        # Start the match once every player has connected.
+        if self.count_joined == self.player_count:
+            for index in self.writers:
+                self.send(pack_message(message_start, index, self.player_count, self.flag_classic, self.seed), [index])
+        parser = MessageReader()
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                for kind, values, _, message in parser.feed(data):
+                    # Ignore messages sent on behalf of other players.
+                    if values[0] != player:
+                        continue
+                    if kind == message_actions:
+                        self.send(message, [index for index in self.writers if index != player])
+                    elif kind == message_garbage:
+                        self.send(message, [values[1]])
+        except ConnectionError:
+            pass
+        # Disconnect a player who sends a malformed message instead of stopping the server.
+        except ValueError as error:
+            print('Disconnected player {}: {}'.format(player, error), file=sys.stderr)
+        finally:
+            del self.writers[player]
+            writer.close()
+            self.send(pack_message(message_leave, player), list(self.writers))
+            if len(self.writers) == 0 and self.count_joined == self.player_count:
+                self.event_done.set()
+
+
+# =============================================================================
+# Clients.
+# =============================================================================
+# A class that connects to the server without asyncio, for programs that exchange messages once per frame, such as the pygame frontend. Connecting waits for the match to start, and exchanging messages afterwards never blocks.
+class NetworkConnection:
+    # Connect to the server at the given host and port, and wait for the match to start.
+    def __init__(self, host=host_default, port=port_default):
+        self.socket = socket.create_connection((host, port))
+        size = 1 + formats_message[message_start].size
+        data = b''
+        while len(data) < size:
+            chunk = self.socket.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError('Server closed the connection before the match started')
+            data += chunk
+        self.player, self.player_count, flag_classic, self.seed = formats_message[message_start].unpack_from(data, 1)
+        self.flag_classic = bool(flag_classic)
+        self.socket.setblocking(False)
+        # Initialize the bytes not yet sent, and the flag indicating whether the connection was closed.
+        self.outgoing = bytearray()
+        self.flag_closed = False
+
+    # Send the given bytes, keeping any that cannot be sent yet for the next call, and return the bytes received since the previous call.
+    def exchange(self, data):
+        if self.flag_closed:
+            return b''
+        self.outgoing += data
+        received = bytearray()
+        try:
+            if len(self.outgoing) > 0:
+                del self.outgoing[:self.socket.send(self.outgoing)]
+        except BlockingIOError:
+            pass
+        except ConnectionError:
+            self.flag_closed = True
+        try:
+            while not self.flag_closed:
+                chunk = self.socket.recv(65536)
+                if not chunk:
+                    self.flag_closed = True
+                received += chunk
+        except BlockingIOError:
+            pass
+        except ConnectionError:
+            self.flag_closed = True
+        return bytes(received)
+
+    # Close the connection.
+    def close(self):
+        self.socket.close()
+        self.flag_closed = True
+
+# Connect to the server at the given host and port, play one match with a headless player game controlled by the AI, and return a dictionary of results, including a hash of the player game and of the copy of each other player's game. Input a number of tetriminos after which to stop, or None to play until losing or winning, and a number of tetriminos for the AI to search ahead, or None to use the default.
+async def run_client(host=host_default, port=port_default, pieces=None, lookahead=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    # Wait for the match to start.
+    data = await reader.readexactly(1 + formats_message[message_start].size)
+    player, player_count, flag_classic, seed = formats_message[message_start].unpack_from(data, 1)
+
+    games = engine.Games()
+    if lookahead is not None:
+        games.ai_lookahead = lookahead
+    game = engine.Tetron(True, 0, games)
+    games.add_game(game)
+    session = NetworkSession(games, player, player_count, seed, bool(flag_classic))
+    bot = NetworkBot(session)
+
+    # Receive messages while playing.
+    async def receive():
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            session.receive(data)
+    task = asyncio.create_task(receive())
+
+    time_start = time.perf_counter()
+    session.start()
+    while not session.is_finished() and not task.done():
+        time_current = games.time_start + int((time.perf_counter() - time_start) * 1000)
+        session.add_garbage()
+        bot.act()
+        session.update_score()
+        # Stop after winning, losing, or placing the given number of tetriminos.
+        if games.update_progress() in ['win', 'lose'] or (pieces is not None and game.count >= pieces):
+            session.perform('stop')
+        session.step(time_current)
+        data = session.flush()
+        if len(data) > 0:
+            writer.write(data)
+            await writer.drain()
+        await asyncio.sleep(duration_frame / 1000)
+    duration = time.perf_counter() - time_start
+    task.cancel()
+    writer.close()
+
+    return {
+        'player': player,
+        'seed': seed,
+        'ticks': get_tick(games),
+        'pieces': game.count,
+        'duration': duration,
+        'bytes_sent': session.bytes_sent,
+        'bytes_received': session.bytes_received,
+        'bytes_per_second': session.bytes_sent / duration,
+        'garbage_sent': session.garbage_sent,
+        'garbage_received': session.garbage_received,
+        'hashes': {str(index): hash_game(games_remote) for index, games_remote in [(player, games)] + list(session.games_remote.items())},
+        }
+
+# Start a server on the loopback interface, play a match between the given number of headless clients, each in its own process, and return a dictionary containing the results of each client and whether every copy of each game matched the original.
+async def run_loopback(player_count, pieces, seed=None, lookahead=None):
+    server = RelayServer(player_count, seed)
+    port = await server.start(host_default, 0)
+    arguments = ['client', '--host', host_default, '--port', str(port), '--pieces', str(pieces)]
+    if lookahead is not None:
+        arguments += ['--lookahead', str(lookahead)]
+    processes = [
+        await asyncio.create_subprocess_exec(sys.executable, __file__, *arguments, stdout=asyncio.subprocess.PIPE)
+        for _ in range(player_count)
+        ]
+    outputs = await asyncio.gather(*[process.communicate() for process in processes])
+    server.close()
+
+    results = sorted([json.loads(stdout) for stdout, _ in outputs], key=lambda result: result['player'])
+    # Compare the hash of each player game with the hashes of its copies in the other processes.
+    flag_match = all([
+        result['hashes'][str(player)] == results[player]['hashes'][str(player)]
+        for result in results for player in range(player_count)
+        ])
+    return {'seed': server.seed, 'match': flag_match, 'clients': results}
+
+# Return the parsed command-line arguments, using the arguments given to the program if none are given.
+def parse_arguments(args=None):
+    parser = argparse.ArgumentParser(description='Play Tetron against other players on a local network.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    parser_server = commands.add_parser('server', help='run a server for one match')
+    parser_server.add_argument('--players', type=int, default=2, help='number of players in the match')
+    parser_server.add_argument('--classic', action='store_true', help='play classic Tetris')
+    parser_client = commands.add_parser('client', help='play a match with a headless game controlled by the AI')
+    parser_loopback = commands.add_parser('loopback', help='run a server and a match between headless clients on this computer, and check that every copy of each game matched the original')
+    parser_loopback.add_argument('--players', type=int, default=2, help='number of players in the match')
+    for parser_command in [parser_server, parser_client]:
+        parser_command.add_argument('--host', default=host_default, help='address of the server')
+        parser_command.add_argument('--port', type=int, default=port_default, help='port of the server')
+    for parser_command in [parser_server, parser_loopback]:
+        parser_command.add_argument('--seed', type=int, help='seed for the games of every player')
+    for parser_command in [parser_client, parser_loopback]:
+        parser_command.add_argument('--pieces', type=int, default=100, help='number of tetriminos after which each game stops')
+        parser_command.add_argument('--lookahead', type=int, help='number of tetriminos the AI searches ahead')
+    return parser.parse_args(args)
+
+
+# =============================================================================
+# Main Program.
+# =============================================================================
+def main(args=None):
+    arguments = parse_arguments(args)
+    if arguments.command == 'server':
+        async def serve():
+            server = RelayServer(arguments.players, arguments.seed, arguments.classic)
+            port = await server.start(arguments.host, arguments.port)
+            print('Listening on {}:{} for {} players'.format(arguments.host, port, arguments.players), file=sys.stderr)
+            await server.wait()
+        asyncio.run(serve())
+    elif arguments.command == 'client':
+        print(json.dumps(asyncio.run(run_client(arguments.host, arguments.port, arguments.pieces, arguments.lookahead))))
+    elif arguments.command == 'loopback':
+        results = asyncio.run(run_loopback(arguments.players, arguments.pieces, arguments.seed, arguments.lookahead))
+        print(json.dumps(results, indent=4))
+        if not results['match']:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/python
+
+# Tetrimino randomizers for Tetron. Selects tetriminos from a pool of classic tetriminos and a pool of advanced tetriminos, selecting the advanced pool with a probability that changes during the game, and counts the tetriminos selected so that their distribution can be checked without storing the sequence. Does not depend on pygame.
+
+
+import argparse
+import json
+import random
+import time
+
+
+# =============================================================================
+# Randomizer Settings.
+# =============================================================================
+# Define the number of previous tetriminos in each pool that the history randomizer avoids, and the number of times it selects again before accepting a tetrimino in its history.
+history_count = 4
+history_rolls = 4
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that selects the category of each tetrimino independently, then selects a tetrimino within the category without repeating any tetrimino until every tetrimino in the category was selected. Each pool has a bag containing its tetriminos in a shuffled order, which is refilled and shuffled when empty, so that each tetrimino is taken from the end of a bag.
+class PoolRandomizer:
+    # Initialize the attributes of the instance of this class by inputting a list of pools, each a list of tetrimino IDs with the classic pool first, and the random number generator used to select tetriminos.
+    def __init__(self, pools, generator):
+        self.pools = [list(pool) for pool in pools]
+        self.random = generator
+        self.bags = [[] for _ in self.pools]
+        # Initialize the number of tetriminos selected, the number selected from each pool, and the number of each tetrimino selected, the index of its last selection, and the longest interval between its selections.
+        self.count = 0
+        self.counts_pool = [0] * len(self.pools)
+        self.counts = {number: 0 for pool in self.pools for number in pool}
+        self.indices_last = {number: -1 for number in self.counts}
+        self.intervals_max = {number: 0 for number in self.counts}
+
+    # Return a list of the given number of tetrimino IDs, selecting the advanced pool for each tetrimino with the given probability.
+    def generate(self, count, weight_advanced):
+        numbers = []
+        for _ in range(count):
+            # Select the advanced pool without using a random number if the probability is 0 or 1.
+            is_advanced = weight_advanced >= 1 or (weight_advanced > 0 and self.random.random() < weight_advanced)
+            number, index_pool = self.select(int(is_advanced))
+            # Count the tetrimino and the interval since it was last selected.
+            self.counts_pool[index_pool] += 1
+            self.counts[number] += 1
+            self.intervals_max[number] = max(self.intervals_max[number], self.count - self.indices_last[number])
+            self.indices_last[number] = self.count
+            self.count += 1
+            numbers.append(number)
+        return numbers
+
+    # Return a tuple (ID, index of the pool) of a tetrimino selected from the pool with the given index.
+    def select(self, index_pool):
+        return self.take(index_pool), index_pool
+
+    # Return the tetrimino at the end of the bag of the pool with the given index, refilling and shuffling the bag if it is empty.
+    def take(self, index_pool):
+        bag = self.bags[index_pool]
+        if len(bag) == 0:
+            bag.extend(self.pools[index_pool])
+            self.random.shuffle(bag)
+        return bag.pop()
+
+    # Return a dictionary describing the distribution of the tetriminos selected so far: the number selected, and for each pool, the fraction of tetriminos selected from it and the chi-squared statistic of the counts of its tetriminos compared with a uniform distribution, and for each tetrimino, its count and the longest interval between selections, including the current interval.
+    def get_statistics(self):
+        pools = []
+        for pool, count_pool in zip(self.pools, self.counts_pool):
+            expected = count_pool / len(pool)
+            pools.append({
+                'count': count_pool,
+                'fraction': count_pool / max(self.count, 1),
+                'chi_squared': sum([(self.counts[number] - expected) ** 2 / expected for number in pool]) if expected > 0 else 0.0,
+                'degrees_of_freedom': len(pool) - 1,
+                })
+        tetriminos = {
+            number: {'count': self.counts[number], 'interval_max': max(self.intervals_max[number], self.count - self.indices_last[number])}
+            for number in self.counts
+            }
+        return {'count': self.count, 'pools': pools, 'tetriminos': tetriminos}
+
+# A class that selects classic tetriminos in bags containing each classic tetrimino once, so that every classic tetrimino appears once in each group of consecutive tetriminos the size of the classic pool. Each classic tetrimino is replaced by an advanced tetrimino, taken from a bag of advanced tetriminos, with the probability of selecting the advanced pool.
+class BagRandomizer(PoolRandomizer):
+    # Return a tuple (ID, index of the pool) of a tetrimino taking the place of the next classic tetrimino, from the pool with the given index.
+    def select(self, index_pool):
+        number = self.take(0)
+        if index_pool > 0:
+            number = self.take(index_pool)
+        return number, index_pool
+
+# A class that selects tetriminos from each pool at random, selecting again up to a maximum number of times if the tetrimino is one of the most recent tetriminos selected from the pool, similarly to the randomizer used in Tetris: The Grand Master.
+class HistoryRandomizer(PoolRandomizer):
+    # Initialize the attributes of the instance of this class, including the most recent tetriminos selected from each pool.
+    def __init__(self, pools, generator):
+        super().__init__(pools, generator)
+        self.histories = [[] for _ in self.pools]
+
+    # Return a tuple (ID, index of the pool) of a tetrimino selected from the pool with the given index, avoiding its most recent tetriminos.
+    def select(self, index_pool):
+        pool = self.pools[index_pool]
+        history = self.histories[index_pool]
+        for _ in range(history_rolls):
+            number = pool[self.random.randrange(len(pool))]
+            if number not in history:
+                break
+        history.append(number)
+        # Keep fewer tetriminos than the pool contains so that some tetriminos can always be selected without selecting again.
+        if len(history) > min(history_count, len(pool) - 1):
+            history.pop(0)
+        return number, index_pool
+
+# Define the randomizer classes used by each strategy.
+strategies = {
+    'pools': PoolRandomizer,
+    'bag': BagRandomizer,
+    'history': HistoryRandomizer,
+    }
+
+
+# =============================================================================
+# Command-Line Interface.
+# =============================================================================
+# Return the parsed command-line arguments, using the arguments given to the program if none are given.
+def parse_arguments(args=None):
+    parser = argparse.ArgumentParser(description='Select many tetriminos with each randomizer and print the distribution of the tetriminos selected.')
+    parser.add_argument('--strategies', nargs='+', choices=list(strategies), default=list(strategies), help='randomizers to run')
+    parser.add_argument('--pieces', type=int, default=1000000, help='number of tetriminos selected by each randomizer')
+    parser.add_argument('--weight', type=float, default=1/3, help='probability of selecting an advanced tetrimino')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the random number generator of each randomizer')
+    return parser.parse_args(args)
+
+
+# =============================================================================
+# Main Program.
+# =============================================================================
+def main(args=None):
+    # Import the tetrimino IDs here, because the game rules import this module.
+    from engine import id_advanced, id_classic
+    arguments = parse_arguments(args)
+    results = {}
+    for name in arguments.strategies:
+        randomizer = strategies[name]([id_classic, id_advanced], random.Random(arguments.seed))
+        time_start = time.perf_counter()
+        # Select tetriminos in batches, as when filling the next queue.
+        for _ in range(arguments.pieces // 1000):
+            randomizer.generate(1000, arguments.weight)
+        randomizer.generate(arguments.pieces % 1000, arguments.weight)
+        results[name] = {'duration': time.perf_counter() - time_start, **randomizer.get_statistics()}
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,615 @@
+#!/usr/bin/python
+
+# Replays for Tetron. Records the actions applied to the games, the updates to the score, and the locked tetriminos as events in a compact binary file, along with keyframes containing the state of every game at regular intervals and an index of the keyframes. Replays are read as a stream, and seeking restores the nearest keyframe and simulates only the ticks after it, so that seeking takes the same time anywhere in a long game. Does not depend on pygame.
+
+
+import argparse
+import bisect
+import io
+import json
+import os
+import pickle
+import random
+import struct
+import sys
+import time
+import zlib
+
+import engine
+import randomizers
+
+
+# =============================================================================
+# Replay Settings.
+# =============================================================================
+# Define the time (ms) between keyframes.
+interval_keyframe = 10000
+# Define the zlib compression level of each chunk.
+level_compression = 9
+
+
+# =============================================================================
+# File Format.
+# =============================================================================
+# Define the bytes at the start of every replay file, followed by the version of the format.
+magic = b'TETRONRP'
+version = 1
+# Define the format of the trailer at the end of a finished replay file, containing the position of the index chunk, followed by the bytes identifying the trailer.
+format_trailer = struct.Struct('!Q4s')
+magic_trailer = b'TRIX'
+# Define the kinds of chunks, each written as one byte, the size of its contents as a varint, and its contents: the header as JSON, events since the previous keyframe, a keyframe containing the state of every game, the state of a random number generator referenced by keyframes, and the index of keyframes.
+chunk_header = 1
+chunk_events = 2
+chunk_keyframe = 3
+chunk_random = 4
+chunk_index = 5
+# Define the kinds of events, whose codes are their indices, and the number of values each kind contains. Each event is written as varints: the number of ticks since the previous event, the code of its kind, and its values.
+kinds_event = ['action', 'ai', 'score', 'progress', 'pause', 'stop', 'skip', 'idle', 'lock']
+counts_value = {'action': 4, 'ai': 2, 'score': 0, 'progress': 0, 'pause': 0, 'stop': 0, 'skip': 1, 'idle': 1, 'lock': 5}
+# Define the classes that keyframes are allowed to contain, so that loading a replay cannot run other code.
+classes_keyframe = {
+    ('engine', 'Piece'),
+    ('engine', 'RowBuffer'),
+    ('numpy', 'ndarray'),
+    ('numpy', 'dtype'),
+    ('numpy.core.multiarray', '_reconstruct'),
+    ('numpy.core.multiarray', 'scalar'),
+    ('numpy._core.multiarray', '_reconstruct'),
+    ('numpy._core.multiarray', 'scalar'),
+    *[('randomizers', strategy.__name__) for strategy in randomizers.strategies.values()],
+    }
+
+
+# =============================================================================
+# Functions.
+# =============================================================================
+# Return the bytes of the given non-negative integer encoded as a varint, with 7 bits in each byte, least significant first, and the highest bit set on every byte except the last.
+def encode_varint(value):
+    data = bytearray()
+    while value >= 0x80:
+        data.append((value & 0x7f) | 0x80)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+# Return a tuple (integer, position after the varint) by decoding the varint at the given position of the given bytes.
+def decode_varint(data, position):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+# Return the given integer mapped to a non-negative integer so that small negative integers are also encoded as short varints.
+def encode_zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+# Return the integer mapped by encode_zigzag to the given non-negative integer.
+def decode_zigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+# Return the bytes of the given events, a list of tuples (tick, kind, values), with ticks counted from the given tick.
+def encode_events(events, tick_previous):
+    data = bytearray()
+    for tick, kind, values in events:
+        data += encode_varint(tick - tick_previous)
+        data += encode_varint(kinds_event.index(kind))
+        for value in values:
+            data += encode_varint(encode_zigzag(value))
+        tick_previous = tick
+    return bytes(data)
+
+# Return a list of tuples (tick, kind, values) of the events in the given bytes, with ticks counted from the given tick.
+def decode_events(data, tick):
+    events = []
+    position = 0
+    while position < len(data):
+        ticks, position = decode_varint(data, position)
+        code, position = decode_varint(data, position)
+        kind = kinds_event[code]
+        values = []
+        for _ in range(counts_value[kind]):
+            value, position = decode_varint(data, position)
+            values.append(decode_zigzag(value))
+        tick += ticks
+        events.append((tick, kind, tuple(values)))
+    return events
+
+# Return the number of ticks simulated since the given games started.
+def get_tick(games):
+    return (games.time_current - games.time_start) // engine.duration_tick
+
+# Return True if any of the given games is paused.
+def is_paused(games):
+    return any([game.flag_paused for game in games.all]) or (games.batch is not None and games.batch.flag_paused)
+
+# Replace the AI of a game in a replay, applying the recorded AI actions for the current tick instead of deciding moves.
+def ai_evaluate_replay(self):
+    self.games.recorder.apply_ai(self)
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that records games to replay files. Attach an instance to Games.recorder to record every game started, each to a new file.
+class ReplayRecorder:
+    # Initialize the attributes of the instance of this class by inputting the path of the file to write, or of a folder to write each replay to a new file named after the time the games started.
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.games = None
+        # Initialize the games being recorded, the path of the replay being written, the time the games started, the events since the previous keyframe, the tick of the previous keyframe, and the latest tick recorded.
+        self.path_current = None
+        self.time_start = 0
+        self.events = []
+        self.tick_keyframe = 0
+        self.tick_last = 0
+        # Initialize the list of tuples (tick, position) of keyframes, and the dictionary of the state and position of the latest chunk written for each random number generator.
+        self.keyframes = []
+        self.randoms = {}
+
+    # Start recording to a new file after the games start.
+    def start(self, games):
+        self.finish()
+        if os.path.isdir(self.path):
+            self.path_current = os.path.join(self.path, 'tetron-{}.replay'.format(time.strftime('%Y%m%d-%H%M%S')))
+        else:
+            self.path_current = self.path
+        self.file = open(self.path_current, 'wb')
+        self.games = games
+        self.time_start = games.time_start
+        self.events = []
+        self.tick_keyframe = 0
+        self.tick_last = 0
+        self.keyframes = []
+        self.randoms = {}
+        self.file.write(magic + bytes([version]))
+        header = {
+            'version': version,
+            'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'seed': games.seed,
+            'count_start': games.count_start,
+            'game_mode': games.game_mode,
+            'flag_classic': games.flag_classic,
+            'row_count': games.row_count,
+            'column_count': games.column_count,
+            'duration_tick': engine.duration_tick,
+            'games': [(game.is_player, game.instance_self) for game in games.all],
+            'batch': games.batch.count if games.batch is not None else None,
+            }
+        self.write_chunk(chunk_header, zlib.compress(json.dumps(header).encode(), level_compression))
+        self.write_keyframe(games, 0)
+
+    # Add an event of the given kind with the given values at the current tick of the given games. Consecutive ticks skipped while no game is playing are combined into one event.
+    def record(self, games, kind, values):
+        if self.file is None:
+            return
+        tick = (games.time_current - self.time_start) // engine.duration_tick
+        if kind == 'idle' and len(self.events) > 0:
+            tick_previous, kind_previous, values_previous = self.events[-1]
+            if kind_previous == 'idle' and tick_previous + values_previous[0] == tick:
+                self.events[-1] = (tick_previous, kind, (values_previous[0] + values[0],))
+                self.tick_last = tick + values[0]
+                return
+        self.events.append((tick, kind, tuple(values)))
+        self.tick_last = max(self.tick_last, tick + (values[0] if kind in ['skip', 'idle'] else 0))
+
+    # Write a keyframe if enough time has passed since the previous keyframe, or finish the replay if no game is playing or paused. Called before each step of the games.
+    def update(self, games):
+        if self.file is None:
+            return
+        if not games.is_playing() and not is_paused(games):
+            self.finish()
+            return
+        tick = (games.time_current - self.time_start) // engine.duration_tick
+        self.tick_last = max(self.tick_last, tick)
+        if (tick - self.tick_keyframe) * engine.duration_tick >= interval_keyframe:
+            self.write_events()
+            self.write_keyframe(games, tick)
+
+    # Write a chunk of the given kind with the given contents and return its position in the file.
+    def write_chunk(self, kind, data):
+        position = self.file.tell()
+        self.file.write(bytes([kind]) + encode_varint(len(data)) + data)
+        return position
+
+    # Write the events since the previous keyframe.
+    def write_events(self):
+        if len(self.events) > 0:
+            self.write_chunk(chunk_events, encode_varint(self.tick_keyframe) + zlib.compress(encode_events(self.events, self.tick_keyframe), level_compression))
+            self.events = []
+
+    # Write a keyframe containing the state of the given games at the given tick. Random number generators are written to separate chunks only when their states changed since they were last written, and keyframes refer to those chunks by position.
+    def write_keyframe(self, games, tick):
+        def persistent_id(value):
+            if not isinstance(value, random.Random):
+                return None
+            state = value.getstate()
+            state_written, position = self.randoms.get(id(value), (None, None))
+            if state != state_written:
+                position = self.write_chunk(chunk_random, zlib.compress(pickle.dumps(state, protocol=4), level_compression))
+                self.randoms[id(value)] = (state, position)
+            return position
+        data = io.BytesIO()
+        pickler = pickle.Pickler(data, protocol=4)
+        pickler.persistent_id = persistent_id
+        pickler.dump(games.get_state())
+        position = self.write_chunk(chunk_keyframe, encode_varint(tick) + zlib.compress(data.getvalue(), level_compression))
+        self.keyframes.append((tick, position))
+        self.tick_keyframe = tick
+
+    # Write the remaining events, the index of keyframes, and the trailer, and close the file.
+    def finish(self):
+        if self.file is None:
+            return
+        self.write_events()
+        self.tick_last = max(self.tick_last, (self.games.time_current - self.time_start) // engine.duration_tick)
+        data = encode_varint(self.tick_last) + encode_varint(len(self.keyframes))
+        tick_previous, position_previous = 0, 0
+        for tick, position in self.keyframes:
+            data += encode_varint(tick - tick_previous) + encode_varint(position - position_previous)
+            tick_previous, position_previous = tick, position
+        position = self.write_chunk(chunk_index, zlib.compress(data, level_compression))
+        self.file.write(format_trailer.pack(position, magic_trailer))
+        self.file.close()
+        self.file = None
+        self.games = None
+
+    # Finish recording.
+    def close(self):
+        self.finish()
+
+
+# A class that loads keyframes, refusing classes that keyframes do not contain, and loading random number generators from the chunks they refer to.
+class KeyframeUnpickler(pickle.Unpickler):
+    # Initialize the attributes of the instance of this class by inputting the file object containing the keyframe and the reader used to read the chunks of random number generators, and the dictionary of generators already loaded, so that objects sharing a generator still share it.
+    def __init__(self, file, reader):
+        super().__init__(file)
+        self.reader = reader
+        self.randoms = {}
+
+    # Return the allowed class with the given module and name.
+    def find_class(self, module, name):
+        if (module, name) not in classes_keyframe:
+            raise pickle.UnpicklingError('Replay keyframes cannot contain {}.{}'.format(module, name))
+        return super().find_class(module, name)
+
+    # Return the random number generator stored in the chunk at the given position.
+    def persistent_load(self, position):
+        if position not in self.randoms:
+            kind, data = self.reader.read_chunk(position)
+            if kind != chunk_random:
+                raise ValueError('Expected a random number generator at position {}'.format(position))
+            generator = random.Random()
+            generator.setstate(pickle.loads(zlib.decompress(data)))
+            self.randoms[position] = generator
+        return self.randoms[position]
+
+
+# A class that reads a replay file as a stream of chunks, reading only the chunks needed.
+class ReplayReader:
+    # Initialize the attributes of the instance of this class by inputting the path of the replay file, and read the header.
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        if self.file.read(len(magic)) != magic:
+            raise ValueError('Not a Tetron replay: {}'.format(path))
+        if self.file.read(1)[0] != version:
+            raise ValueError('Unsupported replay version: {}'.format(path))
+        self.position_start = self.file.tell()
+        kind, data = self.read_chunk(self.position_start)
+        if kind != chunk_header:
+            raise ValueError('Replay has no header: {}'.format(path))
+        self.header = json.loads(zlib.decompress(data))
+        self.position_events = self.file.tell()
+        # Initialize the list of tuples (tick, position) of keyframes and the last tick of the replay, which are read when first needed.
+        self.keyframes = None
+        self.tick_end = None
+
+    # Close the file.
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # Return a tuple (kind, contents) of the chunk at the given position, or None at the end of the chunks, leaving the file at the start of the next chunk.
+    def read_chunk(self, position, flag_contents=True):
+        self.file.seek(position)
+        kind = self.file.read(1)
+        if len(kind) == 0 or kind[0] not in [chunk_header, chunk_events, chunk_keyframe, chunk_random, chunk_index]:
+            return None
+        size = 0
+        shift = 0
+        while True:
+            byte = self.file.read(1)[0]
+            size |= (byte & 0x7f) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        if flag_contents:
+            data = self.file.read(size)
+            if len(data) < size:
+                return None
+        else:
+            # Read only the start of the contents, which contains the tick of keyframes.
+            data = self.file.read(min(size, 10))
+            self.file.seek(position + 1 + len(encode_varint(size)) + size)
+        return kind[0], data
+
+    # Read the index of keyframes from the end of the file, or find the keyframes by reading the kind and size of every chunk if the replay was not finished.
+    def read_index(self):
+        if self.keyframes is not None:
+            return
+        self.file.seek(0, os.SEEK_END)
+        size = self.file.tell()
+        if size >= format_trailer.size:
+            self.file.seek(size - format_trailer.size)
+            position, trailer = format_trailer.unpack(self.file.read(format_trailer.size))
+            if trailer == magic_trailer:
+                _, data = self.read_chunk(position)
+                data = zlib.decompress(data)
+                self.tick_end, index = decode_varint(data, 0)
+                count, index = decode_varint(data, index)
+                self.keyframes = []
+                tick, position = 0, 0
+                for _ in range(count):
+                    ticks, index = decode_varint(data, index)
+                    positions, index = decode_varint(data, index)
+                    tick, position = tick + ticks, position + positions
+                    self.keyframes.append((tick, position))
+                return
+        self.keyframes = []
+        self.tick_end = 0
+        position = self.position_events
+        position_events = None
+        while True:
+            chunk = self.read_chunk(position, flag_contents=False)
+            if chunk is None:
+                break
+            kind, data = chunk
+            if kind == chunk_keyframe:
+                tick, _ = decode_varint(data, 0)
+                self.keyframes.append((tick, position))
+                self.tick_end = max(self.tick_end, tick)
+            elif kind == chunk_events:
+                position_events = position
+            position = self.file.tell()
+        # End at the last recorded event.
+        if position_events is not None:
+            for tick, kind, values in self.read_events(position_events):
+                self.tick_end = max(self.tick_end, tick + (values[0] if kind in ['skip', 'idle'] else 0))
+
+    # Return a tuple (tick, state of the games, position after the keyframe) of the latest keyframe at or before the given tick.
+    def read_keyframe(self, tick):
+        self.read_index()
+        ticks = [tick_keyframe for tick_keyframe, _ in self.keyframes]
+        _, position = self.keyframes[max(0, bisect.bisect_right(ticks, tick) - 1)]
+        kind, data = self.read_chunk(position)
+        position_next = self.file.tell()
+        tick_keyframe, index = decode_varint(data, 0)
+        state = KeyframeUnpickler(io.BytesIO(zlib.decompress(data[index:])), self).load()
+        return tick_keyframe, state, position_next
+
+    # Yield tuples (tick, kind, values) of the events in the chunks from the given position to the end of the replay, reading one chunk at a time.
+    def read_events(self, position=None):
+        if position is None:
+            position = self.position_events
+        while True:
+            chunk = self.read_chunk(position)
+            if chunk is None or chunk[0] == chunk_index:
+                return
+            position = self.file.tell()
+            kind, data = chunk
+            if kind == chunk_events:
+                tick, index = decode_varint(data, 0)
+                yield from decode_events(zlib.decompress(data[index:]), tick)
+
+
+# A class that plays a replay on games created from its header, seeking by restoring keyframes. Acts as the recorder of the games it plays, so that each tetrimino locked is checked against the recording.
+class ReplayPlayer:
+    # Initialize the attributes of the instance of this class by inputting the path of the replay file and the games to play it on, or None to create games without a display. The games must have no other games, and are given the games recorded in the replay.
+    def __init__(self, path, games=None):
+        self.reader = ReplayReader(path)
+        header = self.reader.header
+        if games is None:
+            games = engine.Games(header['row_count'], header['column_count'])
+        if (games.row_count, games.column_count) != (header['row_count'], header['column_count']):
+            raise ValueError('Replay matrices are {} by {}'.format(header['row_count'], header['column_count']))
+        self.games = games
+        # Create the recorded games, replacing their AI with the recorded AI actions.
+        game_class = type('Replay' + games.game_class.__name__, (games.game_class,), {'ai_evaluate': ai_evaluate_replay})
+        games.player, games.ai, games.all = [], [], []
+        games.game_mode = header['game_mode']
+        games.flag_classic = header['flag_classic']
+        games.seed = header['seed']
+        for is_player, instance in header['games']:
+            games.add_game(game_class(is_player, instance, games))
+        games.batch = engine.TetronBatch(header['batch'], games) if header['batch'] is not None else None
+        games.recorder = self
+        # Initialize the current tick, the iterator of events, and the next event.
+        self.tick = 0
+        self.events = None
+        self.event = None
+        self.seek(0)
+
+    # Return the last tick of the replay.
+    def get_tick_end(self):
+        self.reader.read_index()
+        return self.reader.tick_end
+
+    # Restore the games to the given tick, starting from the nearest keyframe.
+    def seek(self, tick):
+        tick = max(0, tick)
+        # Continue playing if the tick is before the next keyframe.
+        if self.events is None or tick < self.tick or tick - self.tick >= interval_keyframe // engine.duration_tick:
+            tick_keyframe, state, position = self.reader.read_keyframe(tick)
+            self.games.set_state(state)
+            self.games.time_target = self.games.time_current
+            self.tick = tick_keyframe
+            self.events = self.reader.read_events(position)
+            self.event = next(self.events, None)
+        self.play(tick)
+
+    # Simulate the games and apply the recorded events until the given tick, including the events recorded between ticks at the given tick, or until the end of the replay.
+    def play(self, tick):
+        tick = min(tick, self.get_tick_end())
+        while self.tick < tick or (self.event is not None and self.event[0] == self.tick <= tick):
+            if self.event is not None and self.event[0] <= self.tick:
+                tick_event, kind, values = self.event
+                if tick_event < self.tick or kind == 'lock':
+                    raise ValueError('Replay diverged at tick {}: expected {} {}'.format(tick_event, kind, values))
+                self.event = next(self.events, None)
+                self.apply(kind, values)
+            else:
+                self.step_tick()
+
+    # Simulate one tick of the games.
+    def step_tick(self):
+        self.games.time_current += engine.duration_tick
+        self.games.time_target = self.games.time_current
+        self.games.time_elapsed += engine.duration_tick
+        self.tick += 1
+        self.games.step_tick()
+
+    # Apply a recorded event of the given kind with the given values.
+    def apply(self, kind, values):
+        if kind == 'action':
+            code, mask, count, is_repeat = values
+            indices = [index for index in range(len(self.games.player)) if mask & (1 << index)]
+            self.games.perform_action(engine.actions_player[code], indices, count, bool(is_repeat))
+        elif kind == 'ai':
+            instance, code = values
+            self.games.all[instance].ai_perform(engine.actions_ai[code])
+        elif kind == 'score':
+            self.games.update_score()
+        elif kind == 'progress':
+            self.games.update_progress()
+        elif kind == 'pause':
+            self.games.pause_games()
+        elif kind == 'stop':
+            self.games.stop_games()
+        elif kind in ['skip', 'idle']:
+            self.games.time_current += values[0] * engine.duration_tick
+            self.games.time_target = self.games.time_current
+            if kind == 'skip':
+                self.games.time_elapsed += values[0] * engine.duration_tick
+            self.tick += values[0]
+
+    # Apply the recorded AI actions of the given game for the current tick.
+    def apply_ai(self, game):
+        while self.event is not None and self.event[:2] == (self.tick, 'ai') and self.event[2][0] == game.instance_self:
+            _, _, (_, code) = self.event
+            self.event = next(self.events, None)
+            game.ai_perform(engine.actions_ai[code])
+
+    # Check that a tetrimino locked while playing the replay matches the next recorded lock. Other events recorded by the games while playing are ignored.
+    def record(self, games, kind, values):
+        if kind != 'lock':
+            return
+        if self.event is None or self.event[1] != 'lock' or self.event[0] != self.tick or self.event[2] != tuple(values):
+            raise ValueError('Replay diverged at tick {}: locked {} but expected {}'.format(self.tick, tuple(values), self.event))
+        self.event = next(self.events, None)
+
+    # Do nothing when the games start, step, or close, which the games report to their recorder.
+    def start(self, games):
+        pass
+
+    def update(self, games):
+        pass
+
+    def close(self):
+        self.reader.close()
+
+
+# =============================================================================
+# Command-Line Interface.
+# =============================================================================
+# Record a game in the given game mode played by the AI for the given number of simulated seconds to the given path, and return the number of ticks recorded.
+def record_game(path, mode, seconds, seed):
+    games = engine.Games(seed=seed)
+    games.add_game(engine.Tetron(True, 0, games))
+    if mode == 'classic':
+        games.flag_classic = True
+    elif mode == 'twin':
+        games.set_mode(2)
+    elif mode == '1v1':
+        games.set_mode(3)
+    elif mode == '99':
+        games.set_mode(4)
+    games.recorder = ReplayRecorder(path)
+    games.start_games()
+    while games.time_current < seconds * 1000 and (games.is_playing() or is_paused(games)):
+        games.set_time(games.time_current + engine.duration_tick)
+        # Control player games with the AI.
+        for game in games.player:
+            if game.flag_playing:
+                game.ai_evaluate()
+        games.update_score()
+        games.update_progress()
+        games.step()
+    ticks = get_tick(games)
+    games.close()
+    return ticks
+
+# Return the parsed command-line arguments, using the arguments given to the program if none are given.
+def parse_arguments(args=None):
+    parser = argparse.ArgumentParser(description='Record, check, and seek Tetron replays.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    parser_record = commands.add_parser('record', help='record a game played by the AI')
+    parser_record.add_argument('path', help='replay file to write')
+    parser_record.add_argument('--mode', choices=['tetron', 'classic', 'twin', '1v1', '99'], default='tetron', help='game mode')
+    parser_record.add_argument('--seconds', type=float, default=60, help='simulated seconds to record')
+    parser_record.add_argument('--seed', type=int, help='seed for the random number generators of each game')
+    parser_info = commands.add_parser('info', help='print the header and size of a replay')
+    parser_info.add_argument('path', help='replay file to read')
+    parser_verify = commands.add_parser('verify', help='play a replay from the start and check every locked tetrimino')
+    parser_verify.add_argument('path', help='replay file to read')
+    parser_seek = commands.add_parser('seek', help='seek to a time in a replay and print the matrices')
+    parser_seek.add_argument('path', help='replay file to read')
+    parser_seek.add_argument('seconds', type=float, help='time to seek to (s)')
+    return parser.parse_args(args)
+
+
+# =============================================================================
+# Main Program.
+# =============================================================================
+def main(args=None):
+    arguments = parse_arguments(args)
+    if arguments.command == 'record':
+        time_start = time.perf_counter()
+        ticks = record_game(arguments.path, arguments.mode, arguments.seconds, arguments.seed)
+        result = {'ticks': ticks, 'bytes': os.path.getsize(arguments.path), 'duration': time.perf_counter() - time_start}
+    elif arguments.command == 'info':
+        with ReplayReader(arguments.path) as reader:
+            reader.read_index()
+            result = {'header': reader.header, 'ticks': reader.tick_end, 'keyframes': len(reader.keyframes), 'bytes': os.path.getsize(arguments.path)}
+    elif arguments.command == 'verify':
+        time_start = time.perf_counter()
+        player = ReplayPlayer(arguments.path)
+        player.play(player.get_tick_end())
+        player.close()
+        result = {'ticks': player.tick, 'duration': time.perf_counter() - time_start, 'pieces': [game.count for game in player.games.all]}
+    elif arguments.command == 'seek':
+        player = ReplayPlayer(arguments.path)
+        time_start = time.perf_counter()
+        player.seek(int(arguments.seconds * 1000) // engine.duration_tick)
+        duration = time.perf_counter() - time_start
+        player.close()
+        result = {
+            'tick': player.tick,
+            'duration': duration,
+            'scores': player.games.score,
+            'matrices': [[''.join(['#' if value > 0 else '.' for value in row]) for row in game.array_stack] for game in player.games.all],
+            }
+    print(json.dumps(result, indent=4))
+
+
+if __name__ == '__main__':
+    main()
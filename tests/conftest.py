@@ -0,0 +1,8 @@
+# Configuration for the Tetron tests. Makes the modules at the root of the repository importable when running pytest from any directory.
+
+
+import os
+import sys
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
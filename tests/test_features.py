@@ -0,0 +1,99 @@
+# Tests for the board features used by the Tetron AI. Checks the features calculated by placing a tetrimino against the features calculated from scratch for the bitboard containing it.
+
+
+import random
+
+import pytest
+
+import engine
+from features import BoardFeatures, calculate_tops
+
+
+# Define the size of the bitboards.
+row_count = 20
+column_count = 10
+
+
+# =============================================================================
+# Functions.
+# =============================================================================
+# Return a random bitboard whose rows are occupied at random below a random height, including full rows and holes.
+def create_bitboard(generator):
+    height = generator.randrange(row_count - 4)
+    rows = [0] * (row_count - height)
+    for _ in range(height):
+        rows.append((1 << column_count) - 1 if generator.random() < 0.1 else generator.getrandbits(column_count))
+    return rows
+
+# Return a new bitboard with a tetrimino with the given row masks inserted at the given row and column, without clearing lines.
+def insert_tetrimino(rows_stack, masks, row, column):
+    rows = list(rows_stack)
+    for index, mask in masks:
+        rows[row+index] |= mask << column if column >= 0 else mask >> -column
+    return rows
+
+# Return a list of tuples (bitboard, masks, row, column) of every placement of random tetriminos into random bitboards.
+def create_placements(seed, count):
+    generator = random.Random(seed)
+    placements = []
+    while len(placements) < count:
+        rows_stack = create_bitboard(generator)
+        number = generator.choice([number for number in engine.id_classic + engine.id_advanced if (number, 0) in engine.tetriminos_rotated])
+        tetrimino, masks = engine.tetriminos_rotated[(number, 0)]
+        column = (column_count - tetrimino.shape[1]) // 2
+        if engine.check_collision(rows_stack, column_count, masks, 0, column):
+            continue
+        for _, column_placed, row_placed, masks_placed in engine.enumerate_placements(rows_stack, column_count, number, tetrimino, masks, 0, 0, column):
+            placements.append((rows_stack, masks_placed[0], row_placed, column_placed))
+    return placements
+
+
+# =============================================================================
+# Tests.
+# =============================================================================
+# Check that every feature after placing a tetrimino matches the features of the bitboard containing it.
+@pytest.mark.parametrize('seed', range(5))
+def test_place_matches_recalculation(seed):
+    for rows_stack, masks, row, column in create_placements(seed, 200):
+        placed = BoardFeatures(rows_stack, column_count).place(masks, row, column, flag_shape=True)
+        expected = BoardFeatures(insert_tetrimino(rows_stack, masks, row, column), column_count)
+        expected.calculate_shape()
+        assert placed == {
+            'lines': expected.lines,
+            'holes': expected.holes,
+            'height': expected.height,
+            'transitions': expected.transitions,
+            'wells': expected.wells,
+            'bumpiness': expected.bumpiness,
+            }
+
+# Check that the features calculated without the shape of the surface match the bitboard containing the tetrimino.
+def test_place_without_shape_matches_recalculation():
+    for rows_stack, masks, row, column in create_placements(10, 200):
+        placed = BoardFeatures(rows_stack, column_count).place(masks, row, column)
+        expected = BoardFeatures(insert_tetrimino(rows_stack, masks, row, column), column_count)
+        assert placed == {'lines': expected.lines, 'holes': expected.holes, 'height': expected.height}
+
+# Check that placing a tetrimino does not change the features or the bitboard it was placed in.
+def test_place_does_not_change_features():
+    rows_stack, masks, row, column = create_placements(20, 1)[0]
+    features = BoardFeatures(rows_stack, column_count)
+    features.calculate_shape()
+    before = (list(features.heights), features.holes, features.transitions, features.wells, features.bumpiness, list(features.rows_stack))
+    features.place(masks, row, column, flag_shape=True)
+    assert (list(features.heights), features.holes, features.transitions, features.wells, features.bumpiness, list(features.rows_stack)) == before
+
+# Check the highest block of each column, including an empty column.
+def test_calculate_tops():
+    rows = [0b0000, 0b0100, 0b0001, 0b0111]
+    assert calculate_tops(rows, 4) == [2, 3, 1, 4]
+
+# Check the features of a small bitboard calculated by hand.
+def test_features_of_bitboard_with_holes():
+    rows = [0b000, 0b010, 0b000, 0b111]
+    features = BoardFeatures(rows, 3)
+    features.calculate_shape()
+    assert features.heights == [1, 3, 1]
+    assert (features.lines, features.holes, features.height) == (1, 1, 3)
+    assert features.wells == 2 + 2
+    assert features.bumpiness == 4
@@ -0,0 +1,76 @@
+# Tests for the key repeats of Tetron. Checks the number of repeats due after the initial delay and between repeats, and that the total does not depend on how often repeats are checked.
+
+
+import pytest
+
+import engine
+from inputs import InputScheduler
+
+
+# Define the repeats of each action as tuples (delay, speed).
+repeats = {'move_left': (100, 20), 'softdrop': (0, 0)}
+
+
+# =============================================================================
+# Tests.
+# =============================================================================
+# Check that no repeats are due before the delay, one is due at the delay, and one more is due every time the speed elapses.
+def test_repeats_after_delay():
+    scheduler = InputScheduler(repeats)
+    scheduler.press('left', 'move_left', [0], 1000)
+    assert scheduler.update(1099) == []
+    assert scheduler.update(1100) == [('move_left', [0], 1)]
+    assert scheduler.update(1119) == []
+    assert scheduler.update(1160) == [('move_left', [0], 3)]
+
+# Check that the total number of repeats at a time is the same however often repeats are checked, such as at different frame rates.
+@pytest.mark.parametrize('interval', [1, 5, 16, 33, 250])
+def test_repeat_count_does_not_depend_on_interval(interval):
+    scheduler = InputScheduler(repeats)
+    scheduler.press('left', 'move_left', [0], 0)
+    total = 0
+    for time_current in list(range(0, 1000, interval)) + [1000]:
+        total += sum([count for _, _, count in scheduler.update(time_current)])
+    assert total == (1000 - 100) // 20 + 1
+
+# Check that actions with a speed of 0 are repeated as many times as possible on every update after the delay.
+def test_repeat_as_many_times_as_possible():
+    scheduler = InputScheduler(repeats)
+    scheduler.press('down', 'softdrop', [1], 0)
+    assert scheduler.update(0) == [('softdrop', [1], -1)]
+    assert scheduler.update(5) == [('softdrop', [1], -1)]
+
+# Check that actions without repeats are ignored, and that released keys stop repeating.
+def test_release():
+    scheduler = InputScheduler(repeats)
+    scheduler.press('space', 'harddrop', [0], 0)
+    scheduler.press('left', 'move_left', [0], 0)
+    scheduler.release('left')
+    assert scheduler.update(1000) == []
+
+# Check that keys that are no longer pressed are released, and that held keys keep repeating.
+def test_release_unpressed():
+    scheduler = InputScheduler(repeats)
+    scheduler.press('left', 'move_left', [0], 0)
+    scheduler.press('down', 'softdrop', [0], 0)
+    scheduler.release_unpressed({'left': True, 'down': False})
+    assert scheduler.update(100) == [('move_left', [0], 1)]
+
+# Check that the games apply each repeat at the tick it becomes due, so that the ticks do not depend on the frame rate.
+def test_games_repeat_at_due_ticks():
+    ticks = []
+    for duration_frame in [5, 16, 50]:
+        games = engine.Games(seed=1)
+        games.add_game(engine.Tetron(True, 0, games))
+        games.scheduler = InputScheduler(repeats)
+        games.start_games()
+        games.scheduler.press('left', 'move_left', [0], games.time_start)
+        times = []
+        perform_action = games.perform_action
+        games.perform_action = lambda action, indices, count=1, is_repeat=False: (times.append(games.time_current), perform_action(action, indices, count, is_repeat))
+        while games.time_current < games.time_start + 300:
+            games.set_time(games.time_current + duration_frame)
+            games.step()
+        games.close()
+        ticks.append([time_repeat - games.time_start for time_repeat in times if time_repeat < games.time_start + 300])
+    assert ticks == [list(range(100, 300, 20))] * 3
@@ -0,0 +1,96 @@
+# Tests for the local-network multiplayer of Tetron. Checks that messages are parsed the same however the stream of bytes is split, and that copies of each player's game stay identical to the original when sessions exchange messages directly.
+
+
+import random
+
+import pytest
+
+import engine
+import network
+from network import MessageReader, pack_actions, pack_message
+
+
+# =============================================================================
+# Functions.
+# =============================================================================
+# Return the bytes of a stream containing one message of each type, and a list of tuples (type, values, events) of the messages.
+def create_stream():
+    events = [(12, 0), (12, 4), (300, network.code_garbage + 3), (65300, 10)]
+    messages = [
+        (network.message_start, (1, 3, 0, 123456789), []),
+        (network.message_actions, (1, 65305, len(events)), [(2, 0), (0, 4), (288, network.code_garbage + 3), (65000, 10)]),
+        (network.message_actions, (1, 65315, 0), []),
+        (network.message_garbage, (1, 2, 4), []),
+        (network.message_leave, (2,), []),
+        ]
+    data = pack_message(network.message_start, 1, 3, 0, 123456789)
+    data += pack_actions(1, 65305, events, 10)
+    data += pack_actions(1, 65315, [], 65305)
+    data += pack_message(network.message_garbage, 1, 2, 4)
+    data += pack_message(network.message_leave, 2)
+    return data, messages
+
+
+# =============================================================================
+# Tests.
+# =============================================================================
+# Check that every message is parsed with its values and events, and that the bytes of each message are the bytes sent.
+def test_reader_parses_messages():
+    data, messages = create_stream()
+    parsed = MessageReader().feed(data)
+    assert [(kind, values, events) for kind, values, events, _ in parsed] == messages
+    assert b''.join([message for _, _, _, message in parsed]) == data
+
+# Check that a stream split at every position, or fed one byte at a time, is parsed into the same messages.
+@pytest.mark.parametrize('seed', range(3))
+def test_reader_handles_partial_messages(seed):
+    data, messages = create_stream()
+    generator = random.Random(seed)
+    reader = MessageReader()
+    parsed = []
+    position = 0
+    while position < len(data):
+        size = generator.randint(1, 5) if seed > 0 else 1
+        parsed += reader.feed(data[position:position+size])
+        position += size
+    assert [(kind, values, events) for kind, values, events, _ in parsed] == messages
+    assert len(reader.buffer) == 0
+
+# Check that a message of an unknown type raises ValueError.
+def test_reader_rejects_unknown_message():
+    with pytest.raises(ValueError):
+        MessageReader().feed(pack_message(network.message_leave, 0) + bytes([250, 1, 2]))
+
+# Check that copies of each player's game match the original after a match between sessions of AI players that exchange messages directly, delivered in uneven chunks.
+def test_sessions_stay_identical():
+    sessions = []
+    for player in range(2):
+        games = engine.Games()
+        games.ai_lookahead = 0
+        games.add_game(engine.Tetron(True, 0, games))
+        sessions.append(network.NetworkSession(games, player, 2, 7))
+    bots = [network.NetworkBot(session, delay=0) for session in sessions]
+    for session in sessions:
+        session.start()
+    generator = random.Random(0)
+    time_current = 0
+    while not all([session.is_finished() for session in sessions]) and time_current < 600000:
+        time_current += 10
+        for session, bot in zip(sessions, bots):
+            session.add_garbage()
+            bot.act()
+            session.update_score()
+            if session.games.update_progress() in ['win', 'lose'] or session.games.player[0].count >= 40:
+                session.perform('stop')
+            session.step(session.games.time_start + time_current)
+        for session, session_other in [sessions, sessions[::-1]]:
+            data = session.flush()
+            split = generator.randint(0, len(data))
+            session_other.receive(data[:split])
+            session_other.receive(data[split:])
+    for session in sessions:
+        session.games.close()
+    assert all([session.is_finished() for session in sessions])
+    assert all([session.games.player[0].count >= 40 or session.games.player[0].flag_lose for session in sessions])
+    for session, session_other in [sessions, sessions[::-1]]:
+        assert network.hash_game(session.games) == network.hash_game(session_other.games_remote[session.player])
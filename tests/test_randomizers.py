@@ -0,0 +1,88 @@
+# Tests for the tetrimino randomizers of Tetron. Checks the rules of each randomizer on long seeded sequences and with scripted random numbers, and the statistics they keep.
+
+
+import random
+
+import pytest
+
+import randomizers
+from randomizers import BagRandomizer, HistoryRandomizer, PoolRandomizer, strategies
+
+
+# Define the pools of tetrimino IDs, with the classic pool first.
+pools = [[100, 200, 300, 400, 500, 600, 700], [101, 102, 201, 202]]
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that returns scripted values instead of random numbers.
+class ScriptedRandom:
+    # Initialize the attributes of the instance of this class by inputting the list of values returned by randrange in order.
+    def __init__(self, values):
+        self.values = list(values)
+
+    # Return the next scripted value.
+    def randrange(self, stop):
+        return self.values.pop(0)
+
+    # Return a value that never selects the advanced pool.
+    def random(self):
+        return 1.0
+
+
+# =============================================================================
+# Tests.
+# =============================================================================
+# Check that the pool randomizer selects each tetrimino of a pool once before repeating any, in each pool separately.
+def test_pool_randomizer_empties_each_bag():
+    randomizer = PoolRandomizer(pools, random.Random(1))
+    numbers = randomizer.generate(7000, 0.4)
+    for pool in pools:
+        selected = [number for number in numbers if number in pool]
+        for index in range(0, len(selected) - len(pool) + 1, len(pool)):
+            assert sorted(selected[index:index+len(pool)]) == sorted(pool)
+
+# Check that each group of classic tetriminos the size of the classic pool contains each classic tetrimino once, and that advanced tetriminos take the place of classic tetriminos.
+@pytest.mark.parametrize('weight_advanced', [0, 0.3])
+def test_bag_randomizer_deals_classic_bags(weight_advanced):
+    randomizer = BagRandomizer(pools, random.Random(2))
+    numbers = randomizer.generate(7000, weight_advanced)
+    for index in range(0, len(numbers), len(pools[0])):
+        group = numbers[index:index+len(pools[0])]
+        classic = [number for number in group if number in pools[0]]
+        assert len(classic) == len(set(classic))
+        if weight_advanced == 0:
+            assert sorted(group) == sorted(pools[0])
+    assert (randomizer.counts_pool[1] > 0) == (weight_advanced > 0)
+
+# Check that the history randomizer selects again while the tetrimino is in its history, up to history_rolls times.
+def test_history_randomizer_rerolls_recent_tetriminos(monkeypatch):
+    monkeypatch.setattr(randomizers, 'history_count', 2)
+    monkeypatch.setattr(randomizers, 'history_rolls', 3)
+    randomizer = HistoryRandomizer(pools, ScriptedRandom([0, 0, 1, 0, 1, 2, 0, 0, 0]))
+    # Select 100, then reroll 100 to select 200, then reroll 100 and 200 to select 300, then accept 100 after every roll.
+    assert randomizer.generate(4, 0) == [100, 200, 300, 100]
+    assert randomizer.histories[0] == [300, 100]
+
+# Check that the history randomizer keeps fewer tetriminos in its history than a pool contains.
+def test_history_randomizer_limits_history(monkeypatch):
+    monkeypatch.setattr(randomizers, 'history_count', 10)
+    randomizer = HistoryRandomizer(pools, random.Random(3))
+    randomizer.generate(100, 0.5)
+    assert [len(history) for history in randomizer.histories] == [len(pool) - 1 for pool in pools]
+
+# Check that every randomizer selects the same tetriminos from the same seed, and counts every tetrimino it selects.
+@pytest.mark.parametrize('name', list(strategies))
+def test_randomizer_statistics(name):
+    numbers = strategies[name](pools, random.Random(4)).generate(1000, 0.25)
+    randomizer = strategies[name](pools, random.Random(4))
+    assert randomizer.generate(1000, 0.25) == numbers
+    statistics = randomizer.get_statistics()
+    assert statistics['count'] == 1000
+    assert sum([pool['count'] for pool in statistics['pools']]) == 1000
+    assert all([statistics['tetriminos'][number]['count'] == numbers.count(number) for number in randomizer.counts])
+    # Check the longest interval between selections of a tetrimino selected at known positions.
+    number = numbers[0]
+    indices = [index for index, selected in enumerate(numbers) if selected == number] + [len(numbers)]
+    assert statistics['tetriminos'][number]['interval_max'] == max([indices[0] + 1] + [b - a for a, b in zip(indices, indices[1:])])
@@ -0,0 +1,78 @@
+# Tests for the replays of Tetron. Checks that integers and events are decoded to the values encoded, and that seeking in a recorded game restores the same games as playing it from the start.
+
+
+import pytest
+
+import engine
+import replay
+
+
+# =============================================================================
+# Functions.
+# =============================================================================
+# Return a tuple describing the state of each game in the given games, used to compare games restored in different ways.
+def describe_games(games):
+    return (games.score, games.remaining, games.stage, [
+        (game.rows_stack[:], game.count, game.score, game.id_current, game.row_current, game.column_current, game.rotation_current, [piece.number for piece in game.queue_next], [piece.number for piece in game.queue_hold], game.queue_garbage[:])
+        for game in games.all
+        ])
+
+# Return the path of a replay of a game played by the AI in the given mode, recorded in the given folder.
+def record(folder, mode, seconds, seed):
+    path = str(folder / '{}.replay'.format(mode))
+    replay.record_game(path, mode, seconds, seed)
+    return path
+
+
+# =============================================================================
+# Tests.
+# =============================================================================
+# Check that varints and zigzag integers are decoded to the integers encoded, including at the boundaries of each byte.
+def test_varint_round_trip():
+    values = [0, 1, 127, 128, 255, 300, 16383, 16384, 2**32 - 1, 2**63]
+    data = b''.join([replay.encode_varint(value) for value in values])
+    position = 0
+    for value in values:
+        decoded, position = replay.decode_varint(data, position)
+        assert decoded == value
+    assert position == len(data)
+    assert [len(replay.encode_varint(value)) for value in [127, 128, 16383, 16384]] == [1, 2, 2, 3]
+
+# Check that zigzag integers are decoded to the integers encoded, and that small negative integers are encoded as small integers.
+def test_zigzag_round_trip():
+    for value in range(-1000, 1000):
+        assert replay.decode_zigzag(replay.encode_zigzag(value)) == value
+    assert [replay.encode_zigzag(value) for value in [0, -1, 1, -2, 2]] == [0, 1, 2, 3, 4]
+
+# Check that events are decoded to the events encoded, with ticks counted from the given tick.
+def test_events_round_trip():
+    events = [(10, 'action', (4, 1, -1, 0)), (10, 'score', ()), (12, 'ai', (3, 2)), (400, 'skip', (50,)), (900, 'lock', (1, 100, 0, 18, -2))]
+    assert replay.decode_events(replay.encode_events(events, 5), 5) == events
+
+# Check that seeking forward and backward across keyframes restores the same games as playing from the start.
+@pytest.mark.parametrize('mode', ['tetron', 'twin'])
+def test_seek_matches_playing(tmp_path, mode):
+    path = record(tmp_path, mode, 25, 3)
+    ticks_keyframe = replay.interval_keyframe // engine.duration_tick
+    ticks = [1, ticks_keyframe - 1, ticks_keyframe, ticks_keyframe * 2 + 7, 100]
+    player = replay.ReplayPlayer(path)
+    expected = {}
+    for tick in sorted(ticks):
+        player.play(tick)
+        expected[tick] = describe_games(player.games)
+    player.close()
+    player = replay.ReplayPlayer(path)
+    for tick in ticks:
+        player.seek(tick)
+        assert player.tick == tick
+        assert describe_games(player.games) == expected[tick]
+    player.close()
+
+# Check that playing a replay to the end places the same tetriminos as the recorded games, which raises an error if the replay diverges.
+def test_play_to_end(tmp_path):
+    path = record(tmp_path, '1v1', 20, 5)
+    player = replay.ReplayPlayer(path)
+    player.play(player.get_tick_end())
+    player.close()
+    assert player.tick == player.get_tick_end() == 20000 // engine.duration_tick
+    assert all([game.count > 0 for game in player.games.all])
@@ -0,0 +1,74 @@
+# Frame timing for Tetron. Records how long each phase of every frame takes, summarizes the durations of recent frames as percentiles, and exports every frame as CSV. Does not depend on pygame.
+
+
+import collections
+import csv
+import time
+
+import numpy as np
+
+
+# =============================================================================
+# Timing Settings.
+# =============================================================================
+# Define the default number of most recent frames kept for summaries. Older frames are discarded so that memory and the time to summarize do not grow during long sessions.
+count_recent = 600
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# A class that records the duration (ms) of each phase of every frame.
+class FrameTimer:
+    # Initialize the attributes of the instance of this class by inputting the names of the phases of a frame in order, the number of most recent frames kept for summaries, and the path of a CSV file to write every frame to as it ends, or None to not write frames.
+    def __init__(self, phases, count=count_recent, path=None):
+        self.phases = list(phases)
+        # Initialize the lists of phase durations of the most recent completed frames, and the number of completed frames.
+        self.frames = collections.deque(maxlen=count)
+        self.count = 0
+        # Initialize the phase durations of the current frame and the time of the previous mark.
+        self.durations = [0] * len(self.phases)
+        self.time_previous = time.perf_counter()
+        # Open the CSV file and write the header.
+        self.file = None
+        self.writer = None
+        if path is not None:
+            self.file = open(path, 'w', newline='')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(['frame'] + self.phases + ['total'])
+
+    # Start timing a new frame.
+    def start_frame(self):
+        self.durations = [0] * len(self.phases)
+        self.time_previous = time.perf_counter()
+
+    # Add the time elapsed since the previous mark to the duration of the given phase.
+    def mark(self, phase):
+        time_current = time.perf_counter()
+        self.durations[self.phases.index(phase)] += (time_current - self.time_previous) * 1000
+        self.time_previous = time_current
+
+    # Finish timing the current frame, and write it to the CSV file.
+    def end_frame(self):
+        self.frames.append(self.durations)
+        if self.writer is not None:
+            self.writer.writerow([self.count] + ['{:.3f}'.format(duration) for duration in self.durations] + ['{:.3f}'.format(sum(self.durations))])
+        self.count += 1
+        self.durations = [0] * len(self.phases)
+
+    # Return a dictionary containing the 50th, 95th, and 99th percentiles of the total frame duration, with key 'frame', and of each phase duration over the most recent frames kept.
+    def summarize(self):
+        if len(self.frames) == 0:
+            return {}
+        frames = np.array(self.frames)
+        summary = {'frame': tuple(np.percentile(np.sum(frames, axis=1), [50, 95, 99]))}
+        for index, phase in enumerate(self.phases):
+            summary[phase] = tuple(np.percentile(frames[:, index], [50, 95, 99]))
+        return summary
+
+    # Close the CSV file.
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.writer = None
@@ -0,0 +1,179 @@
+#!/usr/bin/python
+
+# Self-play tuning for the Tetron AI. Plays headless AI games at a fixed fall speed across worker processes, scores each candidate set of weights by the lines it clears per tetrimino and how long it survives, and improves the weights with the cross-entropy method, saving the best weights after every generation.
+
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import engine
+
+
+# =============================================================================
+# Tuning Settings.
+# =============================================================================
+# Define the fraction of candidates in each generation used to calculate the distribution of the next generation.
+fraction_elite = 0.25
+# Define the noise added to the standard deviation of each weight, relative to its initial standard deviation. The noise decreases linearly to 0 at the last generation, which prevents the distribution from shrinking too early.
+noise = 0.5
+# Define the weight of survival in the score of a candidate. Survival is the fraction of the maximum number of tetriminos a game placed before losing, and is weighted so that surviving every game is worth as much as clearing a line with every 2.5 tetriminos, the most possible.
+weight_survival = 0.4
+
+
+# =============================================================================
+# Classes.
+# =============================================================================
+# The game class with the number of cleared lines counted.
+class TuningTetron(engine.Tetron):
+    # Initialize the number of cleared lines when starting the game.
+    def initialize(self):
+        self.line_total = 0
+        super().initialize()
+
+    # Add the given number of cleared lines to the total and return the points to add to the score.
+    def calculate_score(self, lines):
+        self.line_total += lines
+        return super().calculate_score(lines)
+
+
+# =============================================================================
+# Functions.
+# =============================================================================
+# Play one AI game with the given weights and seed until it loses or places the given number of tetriminos, and return a tuple (cleared lines, placed tetriminos, lost). Input 'greedy' or 'search' to tune the weights used when not searching ahead or when searching ahead.
+def play_game(ai, weights, seed, pieces, speed_fall):
+    # Decide each move as soon as the tetrimino appears, and use the weights being tuned.
+    games = engine.Games(seed=seed)
+    games.ai_delay_mean, games.ai_delay_std = 0, 0
+    if ai == 'greedy':
+        games.ai_weights_greedy = dict(weights)
+        games.ai_lookahead = 0
+    else:
+        games.ai_weights = dict(weights)
+    game = TuningTetron(False, 0, games)
+    games.add_game(game)
+    games.start_games()
+    # The fall speed stays fixed because the score is never updated.
+    game.speed_fall = speed_fall
+    # Advance one tick at a time so that the game stops as soon as it places the last tetrimino, and lines cleared after it are not counted.
+    while game.flag_playing and game.count < pieces:
+        games.set_time(games.time_current + engine.duration_tick)
+        games.step()
+    games.close()
+    return game.line_total, game.count, game.flag_lose
+
+# Return the score of a candidate from the results of its games: the mean number of lines cleared per placed tetrimino, plus the mean fraction of the given number of tetriminos placed before losing, weighted by weight_survival.
+def calculate_score(results, pieces):
+    return float(np.mean([lines / max(count, 1) + weight_survival * count / pieces for lines, count, _ in results]))
+
+# Return a dictionary of weights with the given names and values.
+def create_weights(names, values):
+    return {name: float(value) for name, value in zip(names, values)}
+
+# Return the parsed command-line arguments, using the arguments given to the program if none are given.
+def parse_arguments(args=None):
+    parser = argparse.ArgumentParser(description='Tune the weights used by the Tetron AI by playing headless games in parallel.')
+    parser.add_argument('--ai', choices=['greedy', 'search'], default='greedy', help='tune the weights used when not searching ahead, or when searching ahead')
+    parser.add_argument('--generations', type=int, default=20, help='number of generations')
+    parser.add_argument('--population', type=int, default=32, help='number of candidates in each generation')
+    parser.add_argument('--games', type=int, default=8, help='number of games played by each candidate')
+    parser.add_argument('--pieces', type=int, default=500, help='maximum number of tetriminos placed in each game')
+    parser.add_argument('--speed', type=float, default=engine.speeds_fall[0], help='fixed block fall speed (ms)')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(), help='number of worker processes')
+    parser.add_argument('--seed', type=int, default=1, help='seed for sampling candidates and for the games, which are the same for every candidate')
+    parser.add_argument('--checkpoint', metavar='PATH', default='tuning.json', help='file to save the best weights and the distribution after every generation')
+    parser.add_argument('--resume', action='store_true', help='continue from the distribution saved in the checkpoint file')
+    return parser.parse_args(args)
+
+
+# =============================================================================
+# Main Program.
+# =============================================================================
+def main(args=None):
+    arguments = parse_arguments(args)
+    weights_initial = engine.ai_weights_greedy if arguments.ai == 'greedy' else engine.ai_weights
+    names = list(weights_initial)
+
+    # Start from the current weights, or from the saved distribution.
+    mean = np.array([weights_initial[name] for name in names], dtype=float)
+    std_initial = np.maximum(np.abs(mean), 1) / 2
+    std = std_initial.copy()
+    generation_start = 0
+    best = {'score': None, 'weights': create_weights(names, mean)}
+    history = []
+    if arguments.resume and os.path.exists(arguments.checkpoint):
+        with open(arguments.checkpoint) as file:
+            checkpoint = json.load(file)
+        mean = np.array([checkpoint['mean'][name] for name in names])
+        std = np.array([checkpoint['std'][name] for name in names])
+        generation_start = checkpoint['generation'] + 1
+        best = checkpoint['best']
+        history = checkpoint['history']
+
+    seeds = [arguments.seed * 1000 + index for index in range(arguments.games)]
+    count_elite = max(1, int(round(fraction_elite * arguments.population)))
+    with concurrent.futures.ProcessPoolExecutor(arguments.processes) as executor:
+        for generation in range(generation_start, arguments.generations):
+            time_start = time.perf_counter()
+            # Sample candidates, keeping the current mean as the first candidate. Each generation has its own seed so that resumed runs sample the same candidates.
+            random = np.random.RandomState([arguments.seed, generation])
+            candidates = mean + std * random.standard_normal((arguments.population, len(names)))
+            candidates[0] = mean
+            # Play every game of every candidate in parallel.
+            tasks = [(candidate, seed) for candidate in candidates for seed in seeds]
+            results = list(executor.map(
+                play_game,
+                [arguments.ai] * len(tasks),
+                [create_weights(names, candidate) for candidate, _ in tasks],
+                [seed for _, seed in tasks],
+                [arguments.pieces] * len(tasks),
+                [arguments.speed] * len(tasks),
+                chunksize=1,
+                ))
+            results = [results[index*len(seeds):(index+1)*len(seeds)] for index in range(len(candidates))]
+            scores = np.array([calculate_score(result, arguments.pieces) for result in results])
+
+            # Move the distribution towards the best candidates.
+            order = np.argsort(-scores, kind='stable')
+            elite = candidates[order[:count_elite]]
+            mean = np.mean(elite, axis=0)
+            std = np.std(elite, axis=0) + noise * std_initial * max(0, 1 - (generation+1) / arguments.generations)
+
+            # Record the best candidate and save the checkpoint.
+            index_best = order[0]
+            if best['score'] is None or scores[index_best] > best['score']:
+                best = {
+                    'score': float(scores[index_best]),
+                    'lines_per_piece': float(np.mean([lines / max(count, 1) for lines, count, _ in results[index_best]])),
+                    'survival': float(np.mean([not lost for _, _, lost in results[index_best]])),
+                    'weights': create_weights(names, candidates[index_best]),
+                    }
+            history.append({
+                'generation': generation,
+                'score_best': float(scores[index_best]),
+                'score_mean': float(np.mean(scores)),
+                'score_mean_weights': float(scores[0]),
+                'duration': time.perf_counter() - time_start,
+                })
+            with open(arguments.checkpoint, 'w') as file:
+                json.dump({
+                    'ai': arguments.ai,
+                    'generation': generation,
+                    'mean': create_weights(names, mean),
+                    'std': create_weights(names, std),
+                    'best': best,
+                    'history': history,
+                    'settings': {key: value for key, value in vars(arguments).items() if key not in ['resume', 'checkpoint']},
+                    }, file, indent=4)
+            print('generation {:>3} best {:.4f} mean {:.4f} ({:.1f} s)'.format(generation, scores[index_best], np.mean(scores), history[-1]['duration']), file=sys.stderr)
+
+    print(json.dumps(best, indent=4))
+
+
+if __name__ == '__main__':
+    main()